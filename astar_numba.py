@@ -0,0 +1,298 @@
+# region Imports
+import math
+from typing import Optional, Tuple
+import numpy as np
+from jit import njit
+from rover_astar_sim import _heap_pop, _heap_push, ids_to_rc
+# endregion
+
+# region Kernel
+@njit(cache=True)
+def _astar_roi_nb(cost, r0, c0, Hr, Wr, start, goal,
+                  steps, straight, diag, h_scale, weight, max_expansions):
+    # Search state covers only the ROI: local id = (r - r0) * Wr + (c - c0).
+    N = Hr * Wr
+    g = np.full(N, np.inf, dtype=np.float64)
+    parent = np.full(N, -1, dtype=np.int32)
+    closed = np.zeros(N, dtype=np.uint8)
+    order = np.empty(N, dtype=np.int32)
+    K = steps.shape[0]
+    cap = K * N + 1
+    hf = np.empty(cap, dtype=np.float64)
+    hc = np.empty(cap, dtype=np.int64)
+    hn = np.empty(cap, dtype=np.int32)
+
+    gr = goal // Wr
+    gc = goal % Wr
+    g[start] = 0.0
+    n = _heap_push(hf, hc, hn, 0, 0.0, 0, start)
+    counter = 0
+    expansions = 0
+
+    while n > 0:
+        u, n = _heap_pop(hf, hc, hn, n)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        order[expansions] = u
+        expansions += 1
+        if u == goal:
+            break
+        if max_expansions > 0 and expansions >= max_expansions:
+            break
+
+        ur = u // Wr
+        uc = u % Wr
+        gu = g[u]
+        for k in range(K):
+            dr = steps[k, 0]
+            dc = steps[k, 1]
+            vr = ur + dr
+            vc = uc + dc
+            if vr < 0 or vr >= Hr or vc < 0 or vc >= Wr:
+                continue
+            p = cost[r0 + vr, c0 + vc]
+            if p == np.inf:
+                continue
+            v = vr * Wr + vc
+            if closed[v]:
+                continue
+            step = diag if (dr != 0 and dc != 0) else straight
+            alt = gu + step * float(p)
+            if alt < g[v] - 1e-12:
+                g[v] = alt
+                parent[v] = u
+                ar = abs(vr - gr)
+                ac = abs(vc - gc)
+                if ar < ac:
+                    ar, ac = ac, ar
+                h = (ar * straight + ac * (diag - straight)) * h_scale
+                counter += 1
+                n = _heap_push(hf, hc, hn, n, alt + weight * h, counter, v)
+
+    return g[goal], parent, order[:expansions], expansions
+
+
+@njit(cache=True)
+def _bidir_roi_nb(cost, r0, c0, Hr, Wr, start, goal,
+                  steps, straight, diag, h_scale, max_expansions):
+    # NBA* over the same ROI-local ids: side 0 searches forward from start,
+    # side 1 backward from goal (reverse edge v -> u costs step * cost[u]),
+    # sharing one settled array. Returns the meeting cell and both parents.
+    N = Hr * Wr
+    g = np.full((2, N), np.inf, dtype=np.float64)
+    parent = np.full((2, N), -1, dtype=np.int32)
+    settled = np.zeros(N, dtype=np.uint8)
+    order = np.empty(N, dtype=np.int32)
+    K = steps.shape[0]
+    cap = K * N + 1
+    hf0 = np.empty(cap, dtype=np.float64)
+    hc0 = np.empty(cap, dtype=np.int64)
+    hn0 = np.empty(cap, dtype=np.int32)
+    hf1 = np.empty(cap, dtype=np.float64)
+    hc1 = np.empty(cap, dtype=np.int64)
+    hn1 = np.empty(cap, dtype=np.int32)
+
+    tr = np.empty(2, dtype=np.int64)  # target cell of each side
+    tc = np.empty(2, dtype=np.int64)
+    tr[0] = goal // Wr
+    tc[0] = goal % Wr
+    tr[1] = start // Wr
+    tc[1] = start % Wr
+    dstep = diag - straight
+    ar = abs(tr[0] - tr[1])
+    ac = abs(tc[0] - tc[1])
+    h0 = (max(ar, ac) * straight + min(ar, ac) * dstep) * h_scale
+    F = np.array([h0, h0])  # lower bound on each side's open f
+    g[0, start] = 0.0
+    g[1, goal] = 0.0
+    n0 = _heap_push(hf0, hc0, hn0, 0, h0, 0, start)
+    n1 = _heap_push(hf1, hc1, hn1, 0, h0, 0, goal)
+    counter = 0
+    expansions = 0
+    best = np.inf
+    meet = -1
+
+    while n0 > 0 and n1 > 0:
+        # grow the smaller frontier
+        side = 0 if n0 <= n1 else 1
+        other = 1 - side
+        if side == 0:
+            u, n0 = _heap_pop(hf0, hc0, hn0, n0)
+        else:
+            u, n1 = _heap_pop(hf1, hc1, hn1, n1)
+        if settled[u] == 0:
+            settled[u] = 1
+            ur = u // Wr
+            uc = u % Wr
+            gu = g[side, u]
+            ar = abs(ur - tr[side])
+            ac = abs(uc - tc[side])
+            hs = (max(ar, ac) * straight + min(ar, ac) * dstep) * h_scale
+            ar = abs(ur - tr[other])
+            ac = abs(uc - tc[other])
+            ho = (max(ar, ac) * straight + min(ar, ac) * dstep) * h_scale
+            if gu + hs < best and gu + F[other] - ho < best:
+                order[expansions] = u
+                expansions += 1
+                if max_expansions > 0 and expansions >= max_expansions:
+                    break
+                pu = cost[r0 + ur, c0 + uc]
+                for k in range(K):
+                    dr = steps[k, 0]
+                    dc = steps[k, 1]
+                    vr = ur + dr
+                    vc = uc + dc
+                    if vr < 0 or vr >= Hr or vc < 0 or vc >= Wr:
+                        continue
+                    pv = cost[r0 + vr, c0 + vc]
+                    if pv == np.inf:
+                        continue
+                    v = vr * Wr + vc
+                    if settled[v]:
+                        continue
+                    step = diag if (dr != 0 and dc != 0) else straight
+                    alt = gu + step * float(pv if side == 0 else pu)
+                    if alt < g[side, v] - 1e-12:
+                        g[side, v] = alt
+                        parent[side, v] = u
+                        ar = abs(vr - tr[side])
+                        ac = abs(vc - tc[side])
+                        h = (max(ar, ac) * straight + min(ar, ac) * dstep) * h_scale
+                        counter += 1
+                        if side == 0:
+                            n0 = _heap_push(hf0, hc0, hn0, n0, alt + h, counter, v)
+                        else:
+                            n1 = _heap_push(hf1, hc1, hn1, n1, alt + h, counter, v)
+                        if alt + g[other, v] < best:
+                            best = alt + g[other, v]
+                            meet = v
+        if side == 0 and n0 > 0:
+            F[0] = hf0[0]
+        elif side == 1 and n1 > 0:
+            F[1] = hf1[0]
+
+    return best, meet, parent, order[:expansions], expansions
+
+
+@njit(cache=True)
+def _reconstruct_local(parent, goal):
+    n = 0
+    v = goal
+    while v >= 0:
+        n += 1
+        v = parent[v]
+    ids = np.empty(n, dtype=np.int32)
+    v = goal
+    for i in range(n - 1, -1, -1):
+        ids[i] = v
+        v = parent[v]
+    return ids
+# endregion
+
+# region A* over a Penalty Plane
+def _local_to_rc(ids, r0, c0, Wr):
+    return list(zip((ids // Wr + r0).tolist(), (ids % Wr + c0).tolist()))
+
+
+def astar_numba(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    cost: np.ndarray,
+    bounds: Tuple[int, int, int, int],
+    steps: np.ndarray,
+    *,
+    meters_per_cell: float,
+    diag_cost: float = math.sqrt(2.0),
+    weight: float = 1.0,
+    max_expansions: Optional[int] = None,
+):
+    """
+    Compiled A* for WeightedCost: an edge u -> v costs step_m * cost[v]
+    (step_m is meters_per_cell, times diag_cost for diagonals), where cost is
+    WeightedCost.cost_grid with +inf on blocked cells, and the search stays
+    in bounds = (rmin, rmax, cmin, cmax). steps is an (K, 2) int32 array of
+    (dr, dc) offsets (run_simulation.STEPS4 / STEPS8).
+
+    Returns the same tuple as rover_astar_sim.astar.
+    """
+    if start == goal:
+        return [start], 0.0, 0, np.array([start], dtype=np.int32), None
+
+    rmin, rmax, cmin, cmax = bounds
+    Hr, Wr = rmax - rmin + 1, cmax - cmin + 1
+    straight = float(meters_per_cell)
+    diag = straight * float(diag_cost)
+    steps = np.ascontiguousarray(steps, dtype=np.int32)
+    if not np.any((steps[:, 0] != 0) & (steps[:, 1] != 0)):
+        # 4-connected: no diagonal edge uses diag, and with diag = 2 * straight
+        # the kernel's octile heuristic becomes the (tighter) Manhattan distance
+        diag = 2.0 * straight
+    roi = cost[rmin:rmax + 1, cmin:cmax + 1]
+    # octile distance in meters times the cheapest cell cost in the ROI
+    h_scale = float(roi.min()) if roi.size else 0.0
+    h_scale = h_scale if np.isfinite(h_scale) else 0.0
+
+    total, parent, order, expansions = _astar_roi_nb(
+        cost, rmin, cmin, Hr, Wr,
+        (start[0] - rmin) * Wr + (start[1] - cmin),
+        (goal[0] - rmin) * Wr + (goal[1] - cmin),
+        steps,
+        straight, diag, max(0.0, h_scale), float(weight),
+        int(max_expansions or 0),
+    )
+    expanded_order = ids_to_rc(order, Wr, rmin, cmin)
+    if not np.isfinite(total):
+        return None, float("inf"), int(expansions), expanded_order, None
+    ids = _reconstruct_local(parent, (goal[0] - rmin) * Wr + (goal[1] - cmin))
+    path = _local_to_rc(ids, rmin, cmin, Wr)
+    return path, float(total), int(expansions), expanded_order, None
+
+
+def astar_bidir_numba(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    cost: np.ndarray,
+    bounds: Tuple[int, int, int, int],
+    steps: np.ndarray,
+    *,
+    meters_per_cell: float,
+    diag_cost: float = math.sqrt(2.0),
+    max_expansions: Optional[int] = None,
+):
+    """
+    Exact bidirectional (NBA*) version of astar_numba with the same cost
+    model and arguments; there is no weight, since the pruning rules need
+    the plain admissible heuristic. Pays two heaps, so it only wins on
+    long legs. Returns the same tuple as rover_astar_sim.astar.
+    """
+    if start == goal:
+        return [start], 0.0, 0, np.array([start], dtype=np.int32), None
+
+    rmin, rmax, cmin, cmax = bounds
+    Hr, Wr = rmax - rmin + 1, cmax - cmin + 1
+    straight = float(meters_per_cell)
+    diag = straight * float(diag_cost)
+    steps = np.ascontiguousarray(steps, dtype=np.int32)
+    if not np.any((steps[:, 0] != 0) & (steps[:, 1] != 0)):
+        diag = 2.0 * straight
+    roi = cost[rmin:rmax + 1, cmin:cmax + 1]
+    h_scale = float(roi.min()) if roi.size else 0.0
+    h_scale = h_scale if np.isfinite(h_scale) else 0.0
+
+    total, meet, parent, order, expansions = _bidir_roi_nb(
+        cost, rmin, cmin, Hr, Wr,
+        (start[0] - rmin) * Wr + (start[1] - cmin),
+        (goal[0] - rmin) * Wr + (goal[1] - cmin),
+        steps,
+        straight, diag, max(0.0, h_scale),
+        int(max_expansions or 0),
+    )
+    expanded_order = ids_to_rc(order, Wr, rmin, cmin)
+    if meet < 0 or not np.isfinite(total):
+        return None, float("inf"), int(expansions), expanded_order, None
+    fwd = _reconstruct_local(parent[0], meet)
+    bwd = _reconstruct_local(parent[1], meet)[::-1]
+    path = _local_to_rc(np.concatenate([fwd, bwd[1:]]), rmin, cmin, Wr)
+    return path, float(total), int(expansions), expanded_order, None
+# endregion
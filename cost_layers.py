@@ -4,17 +4,21 @@
 #
 # Exposes:
 #   - CostLayers              (data container)
+#   - compute_slope(height, meters_per_cell, method="central")
 #   - make_mars_from_geotiff_window(path, window, target_max_dim, ...)
 #   - make_synthetic_mars(H=256, W=256, seed=0, ...)
 #   - WeightedCost            (builds edge_cost_fn(layers))
 #
 # Dependencies: numpy, rasterio (for GeoTIFF path)
-# Optional: nothing else
+# Optional: numba (fused terrain kernels; falls back to NumPy),
+#           scipy (Horn slope stencil)
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Callable, Optional, Tuple
+from typing import Any, Callable, Optional, Tuple
+import math
 import numpy as np
+from jit import HAVE_NUMBA, njit, prange
 
 # RasterIO is imported lazily inside functions that need it.
 
@@ -31,32 +35,134 @@ class CostLayers:
     rough:  per-cell roughness [0..1], shape (H,W)
     blocked: boolean mask, True = impassable, shape (H,W)
     meters_per_cell: approximate ground resolution for one grid step
+    cost:   optional float32 per-cell cost grid (WeightedCost.cost_grid),
+            +inf on blocked cells
+    cost_weights: (w_dist, w_slope, w_rough) that cost was built with
+            (set together with it by WeightedCost.attach_grid)
     """
     height: Optional[np.ndarray]
     slope: np.ndarray
     rough: np.ndarray
     blocked: np.ndarray
     meters_per_cell: float
+    cost: Optional[np.ndarray] = None
+    cost_weights: Optional[Tuple[float, float, float]] = None
+
+    def pack(self) -> "CostLayers":
+        """
+        Co-allocate slope, rough and height as planes of one C-contiguous
+        float32 block (slope=buf[0], rough=buf[1], height=buf[2]) and rebind
+        the fields to views into it. Returns self.
+        """
+        planes = [self.slope, self.rough]
+        if self.height is not None:
+            planes.append(self.height)
+        H, W = self.slope.shape
+        buf = np.empty((len(planes), H, W), dtype=np.float32, order="C")
+        for k, plane in enumerate(planes):
+            buf[k] = plane
+        self._buf = buf
+        self.slope = buf[0]
+        self.rough = buf[1]
+        if self.height is not None:
+            self.height = buf[2]
+        return self
 
 
 # -----------------------------
 # Utilities
 # -----------------------------
 
-def _safe_float(x) -> float:
-    """Return Python float for a 0-dim numpy scalar."""
-    return float(np.asarray(x))
+_RAD2DEG = 180.0 / math.pi
+
+# Tile edge (cells) for the blocked stencil kernels; 256x256 float32 tiles
+# plus halo stay resident in L2 while gx, gy and the output are produced.
+TILE = 256
+
+
+@njit(cache=True)
+def _d_axis0(h, i, j, n):
+    # np.gradient semantics: central inside, one-sided at the edges
+    if n < 2:
+        return 0.0
+    if i == 0:
+        return float(h[1, j]) - float(h[0, j])
+    if i == n - 1:
+        return float(h[n - 1, j]) - float(h[n - 2, j])
+    return 0.5 * (float(h[i + 1, j]) - float(h[i - 1, j]))
+
+
+@njit(cache=True)
+def _d_axis1(h, i, j, n):
+    if n < 2:
+        return 0.0
+    if j == 0:
+        return float(h[i, 1]) - float(h[i, 0])
+    if j == n - 1:
+        return float(h[i, n - 1]) - float(h[i, n - 2])
+    return 0.5 * (float(h[i, j + 1]) - float(h[i, j - 1]))
+
 
-def _compute_slope_deg(height: np.ndarray, meters_per_cell: float) -> np.ndarray:
+@njit(parallel=True, cache=True)
+def _grad_tiled(height, spacing, as_slope_deg, out):
     """
-    Slope from DEM using central differences.
-      slope = arctan( sqrt( (dz/dx)^2 + (dz/dy)^2 ) )  [degrees]
+    Gradient magnitude of `height` (cell spacing `spacing`) computed tile by
+    tile straight from the DEM, so gx/gy never exist as full arrays. With
+    as_slope_deg the magnitude is converted to slope in degrees.
+    """
+    H, W = height.shape
+    inv = 1.0 / spacing
+    n_tiles = (H + TILE - 1) // TILE
+    for t in prange(n_tiles):
+        i0 = t * TILE
+        i1 = min(H, i0 + TILE)
+        for j0 in range(0, W, TILE):
+            j1 = min(W, j0 + TILE)
+            for i in range(i0, i1):
+                for j in range(j0, j1):
+                    gy = _d_axis0(height, i, j, H) * inv
+                    gx = _d_axis1(height, i, j, W) * inv
+                    m = math.sqrt(gx * gx + gy * gy)
+                    if as_slope_deg:
+                        m = math.atan(m) * _RAD2DEG
+                    out[i, j] = m if math.isfinite(m) else 0.0
+
+
+def _horn_slope_deg(height: np.ndarray, meters_per_cell: float) -> np.ndarray:
+    # Horn 3x3 stencil as separable passes: smooth [1, 2, 1] across, then
+    # difference [-1, 0, 1] along each axis (the r.slope.aspect kernel).
+    from scipy.ndimage import correlate1d
+
+    h = np.asarray(height, dtype=np.float32)
+    smooth = np.array([1.0, 2.0, 1.0], dtype=np.float32)
+    diff = np.array([-1.0, 0.0, 1.0], dtype=np.float32) / np.float32(8.0 * meters_per_cell)
+    dz_dx = correlate1d(correlate1d(h, smooth, axis=0, mode="nearest"), diff, axis=1, mode="nearest")
+    dz_dy = correlate1d(correlate1d(h, smooth, axis=1, mode="nearest"), diff, axis=0, mode="nearest")
+    slope_deg = np.degrees(np.arctan(np.hypot(dz_dx, dz_dy)))
+    return np.nan_to_num(slope_deg, copy=False, nan=0.0, posinf=90.0, neginf=0.0)
+
+
+def compute_slope(height: np.ndarray, meters_per_cell: float, method: str = "central") -> np.ndarray:
+    """
+    Slope from DEM in degrees, float32:
+      slope = arctan( sqrt( (dz/dx)^2 + (dz/dy)^2 ) )
+    method="central" uses central differences (np.gradient semantics, the
+    default the loaders use); method="horn" uses Horn's 3x3 weighted
+    stencil, which smooths single-cell noise (needs scipy).
     """
     if height is None:
         raise ValueError("Height/DEM required to compute slope.")
+    if method == "horn":
+        return _horn_slope_deg(height, meters_per_cell)
+    if method != "central":
+        raise ValueError(f"unknown slope method: {method!r}")
+    if HAVE_NUMBA:
+        slope_deg = np.empty(height.shape, dtype=np.float32)
+        _grad_tiled(height, float(meters_per_cell), True, slope_deg)
+        return slope_deg
     # spacing in meters for both axes
     gy, gx = np.gradient(height, meters_per_cell, meters_per_cell)
-    grad_mag = np.hypot(gx, gy)
+    grad_mag = np.sqrt(gx * gx + gy * gy)
     slope_rad = np.arctan(grad_mag)
     slope_deg = np.degrees(slope_rad)
     # sanitize
@@ -71,14 +177,18 @@ def _compute_roughness(height: np.ndarray) -> np.ndarray:
     if height is None:
         # If no DEM, provide a mild constant roughness.
         return np.full((1, 1), 0.0, dtype=np.float32)
-    gy, gx = np.gradient(height.astype(np.float32))
-    g = np.hypot(gx, gy)
+    if HAVE_NUMBA:
+        g = np.empty(height.shape, dtype=np.float32)
+        _grad_tiled(height.astype(np.float32, copy=False), 1.0, False, g)
+    else:
+        gy, gx = np.gradient(height.astype(np.float32, copy=False))
+        g = np.sqrt(gx * gx + gy * gy)
     # Local normalize to [0..1]
-    g = g - g.min()
+    g -= g.min()
     vmax = g.max()
     if vmax > 1e-12:
-        g = g / vmax
-    return g.astype(np.float32)
+        g /= vmax
+    return g.astype(np.float32, copy=False)
 
 
 # -----------------------------
@@ -151,47 +261,45 @@ def make_mars_from_geotiff_window(
 
         # --- read DEM as float32, resampled to (H_out,W_out) ---
         # If dataset has multiple bands, try band 1 as height proxy.
+        # out_dtype decodes straight into float32 (no float64 intermediate).
         arr = ds.read(
             1,
             window=window,
             out_shape=(H_out, W_out),
-            resampling=Resampling.bilinear
-        ).astype(np.float32)
+            resampling=Resampling.bilinear,
+            out_dtype="float32",
+        )
 
-        # Handle nodata
+        # Handle nodata (in place)
         nodata = ds.nodata
         if nodata is not None:
-            mask_nodata = np.isclose(arr, nodata)
-        else:
-            mask_nodata = np.isnan(arr)
-        arr = np.where(mask_nodata, np.nan, arr)
+            arr[np.isclose(arr, nodata)] = np.nan
 
     height = arr  # DEM (can be NaN at nodata)
+    # One NaN fill shared by both derived layers
+    invalid = ~np.isfinite(height)
+    filled = np.where(invalid, np.nanmean(height), height)
     # Slope & roughness
-    slope_deg = _compute_slope_deg(np.nan_to_num(height, nan=np.nanmean(height)), meters_per_cell)
-    rough = _compute_roughness(np.nan_to_num(height, nan=np.nanmean(height)))
-
-    # Blocked:
-    blocked = np.zeros_like(slope_deg, dtype=bool)
+    slope_deg = compute_slope(filled, meters_per_cell)
+    rough = _compute_roughness(filled)
 
-    # Block nodata/NaNs
-    blocked |= ~np.isfinite(height)
-
-    # Optionally block by slope threshold
+    # Blocked: nodata/NaNs, optionally steep slopes, in one pass
     if block_by_slope and steep_block_thresh_deg is not None:
-        blocked |= (slope_deg >= float(steep_block_thresh_deg))
+        blocked = invalid | (slope_deg >= float(steep_block_thresh_deg))
+    else:
+        blocked = invalid
 
-    # Final sanitize
-    slope_deg = np.nan_to_num(slope_deg, nan=0.0, posinf=90.0, neginf=0.0).astype(np.float32)
-    rough = np.nan_to_num(rough, nan=0.0, posinf=1.0, neginf=0.0).astype(np.float32)
+    # Final sanitize (in place; both planes are already float32)
+    slope_deg = np.nan_to_num(slope_deg, copy=False, nan=0.0, posinf=90.0, neginf=0.0)
+    rough = np.nan_to_num(rough, copy=False, nan=0.0, posinf=1.0, neginf=0.0)
 
     return CostLayers(
-        height=height.astype(np.float32),
+        height=height.astype(np.float32, copy=False),
         slope=slope_deg,
         rough=rough,
         blocked=blocked,
         meters_per_cell=float(meters_per_cell),
-    )
+    ).pack()
 
 
 # -----------------------------
@@ -218,15 +326,17 @@ def make_synthetic_mars(
     noise = rng.normal(0, 10.0, (H, W))
     height = (base + long_waves + noise).astype(np.float32)
 
-    # a few "craters"
-    for _ in range(6):
-        r0 = rng.integers(0, H)
-        c0 = rng.integers(0, W)
-        rr, cc = np.ogrid[:H, :W]
-        dist = np.hypot(rr - r0, cc - c0)
-        height -= 150 * np.exp(-(dist**2) / (2*(rng.uniform(8, 18)**2)))
-
-    slope_deg = _compute_slope_deg(height, meters_per_cell)
+    # a few "craters", evaluated together as one (6,H,W) broadcast
+    n_craters = 6
+    r0 = rng.integers(0, H, size=n_craters).astype(np.float32)[:, None, None]
+    c0 = rng.integers(0, W, size=n_craters).astype(np.float32)[:, None, None]
+    sig = rng.uniform(8, 18, size=n_craters).astype(np.float32)[:, None, None]
+    rr = np.arange(H, dtype=np.float32)[None, :, None]
+    cc = np.arange(W, dtype=np.float32)[None, None, :]
+    d2 = (rr - r0) ** 2 + (cc - c0) ** 2
+    height -= (150.0 * np.exp(-d2 / (2.0 * sig ** 2))).sum(axis=0, dtype=np.float32)
+
+    slope_deg = compute_slope(height, meters_per_cell)
     rough = _compute_roughness(height)
 
     blocked = np.zeros((H, W), dtype=bool)
@@ -239,7 +349,7 @@ def make_synthetic_mars(
         rough=np.nan_to_num(rough, nan=0.0).astype(np.float32),
         blocked=blocked,
         meters_per_cell=float(meters_per_cell),
-    )
+    ).pack()
 
 
 # -----------------------------
@@ -275,10 +385,45 @@ class WeightedCost:
         self.diag_cost = float(diag_cost)
         self.block_penalty = float(block_penalty)
 
-    def edge_cost_fn(self, layers: CostLayers) -> Callable[[Tuple[int,int], Tuple[int,int]], float]:
+    def _penalty(self, layers: CostLayers) -> np.ndarray:
+        # Everything except the step length depends only on v, so fold it into
+        # one float32 plane up front; the per-edge work is then a single lookup.
+        return (
+            self.w_dist
+            + self.w_slope * (layers.slope / 45.0)
+            + self.w_rough * layers.rough
+        ).astype(np.float32)
+
+    def cost_grid(self, layers: CostLayers) -> np.ndarray:
+        """
+        Per-cell penalty as float32 with +inf on blocked cells, so an edge
+        u -> v costs step_m * C[v] and feasibility needs no second lookup.
+        """
+        C = self._penalty(layers)
+        C[np.asarray(layers.blocked, dtype=bool)] = np.inf
+        return C
+
+    @property
+    def weights(self) -> Tuple[float, float, float]:
+        """The weights cost_grid depends on, as stored in CostLayers.cost_weights."""
+        return (self.w_dist, self.w_slope, self.w_rough)
+
+    def attach_grid(self, layers: CostLayers) -> np.ndarray:
+        """
+        layers.cost if it was built with these weights, else a new cost_grid
+        stored there (with cost_weights) and returned.
+        """
+        if layers.cost is None or layers.cost_weights != self.weights:
+            layers.cost = self.cost_grid(layers)
+            layers.cost_weights = self.weights
+        return layers.cost
+
+    def edge_cost_fn(self, layers: CostLayers, flat: bool = False) -> Callable[[Any, Any], float]:
         """
         Returns a function(u, v) that computes edge cost from cell u -> v.
         Assumes 4- or 8-connected neighbors; diagonal steps use diag_cost.
+        With flat=True, u and v are flat cell ids r * W + c instead of
+        (r, c) tuples (for astar(..., flat_ids=True)).
 
         Cost model:
             step_dist_meters
@@ -287,40 +432,53 @@ class WeightedCost:
             + w_rough * rough(v) )
 
         If destination v is blocked -> returns block_penalty (np.inf).
+        Reads layers.cost when it was built with these weights (see
+        attach_grid), else builds its own grid without touching layers.
         """
-        slope = layers.slope
-        rough = layers.rough
-        blocked = layers.blocked
         mpc = float(layers.meters_per_cell)
-
-        H, W = slope.shape
+        if layers.cost is not None and layers.cost_weights == self.weights:
+            C = layers.cost
+        else:
+            C = self.cost_grid(layers)
+        H, W = C.shape
+        block_penalty = self.block_penalty
+        straight = mpc
+        diag = mpc * self.diag_cost
 
         def cost(u: Tuple[int,int], v: Tuple[int,int]) -> float:
-            ur, uc = u
             vr, vc = v
 
             # Bound check (should be unnecessary if neighbor generator is correct)
             if not (0 <= vr < H and 0 <= vc < W):
-                return self.block_penalty
-
-            # If destination is blocked => impassable
-            if bool(blocked[vr, vc]):
-                return self.block_penalty
-
-            dr = vr - ur
-            dc = vc - uc
-            step = self.diag_cost if (dr != 0 and dc != 0) else 1.0
-            step_dist = mpc * step
-
-            sdeg = _safe_float(slope[vr, vc])  # degrees
-            rgh = _safe_float(rough[vr, vc])   # 0..1
-
-            penalty = (
-                self.w_dist
-                + self.w_slope * (sdeg / 45.0)
-                + self.w_rough * rgh
-            )
-
-            return float(step_dist * penalty)
-
-        return cost
+                return block_penalty
+
+            # If destination is blocked (+inf in the grid) => impassable
+            p = float(C[vr, vc])
+            if p == math.inf:
+                return block_penalty
+
+            step = diag if (vr != u[0] and vc != u[1]) else straight
+            return step * p
+
+        if not flat:
+            return cost
+
+        # Flat-id variant: the cost grid as a plain list indexed by id, the
+        # same values the tuple closure reads.
+        N = H * W
+        pen = C.ravel().tolist()
+        inf = math.inf
+
+        def cost_flat(ui: int, vi: int) -> float:
+            if not (0 <= vi < N):
+                return block_penalty
+            p = pen[vi]
+            if p == inf:
+                return block_penalty
+            # by row/col, not vi - ui: W - 1 == 1 would pass as straight when W == 2
+            ur, uc = divmod(ui, W)
+            vr, vc = divmod(vi, W)
+            step = diag if (vr != ur and vc != uc) else straight
+            return step * p
+
+        return cost_flat
@@ -1,7 +1,10 @@
 # region Imports
 import math
+import numpy as np
 # endregion
 
+_SQRT2 = math.sqrt(2.0)
+
 # region Energy Parameter Model
 class EnergyParams:
     def __init__(
@@ -27,15 +30,65 @@ class EnergyParams:
         self.downhill_regen_eff = max(0.0, min(0.5, downhill_regen_eff))
         self.min_grade = min_grade
         self.max_grade = max_grade
+
+    # Constant factors of the per-edge energy terms; properties, so changing
+    # mass_kg / g / Crr / eta after construction is picked up
+    @property
+    def _mg(self):
+        return self.mass_kg * self.g
+
+    @property
+    def _roll_flat(self):
+        return self.Crr * self.mass_kg * self.g
+
+    @property
+    def _inv_eta(self):
+        return 1.0 / max(1e-6, min(1.0, self.eta))
 # endregion
 
 # region Helper Functions
 def _grid_step_m(dr, dc, meters_per_cell):
-    base = math.sqrt(2.0) if (dr != 0 and dc != 0) else 1.0
+    base = _SQRT2 if (dr != 0 and dc != 0) else 1.0
     return base * meters_per_cell
 # endregion
 
 # region Energy Calculation
+def _elevation_m(layers, P: EnergyParams):
+    """Elevation plane in meters (scaled from normalized height if needed), or None."""
+    if getattr(layers, "elevation_m", None) is not None:
+        return layers.elevation_m
+    if layers.height is not None:
+        # float64 so scaled differences match (dh_norm * scale) per edge
+        return layers.height.astype(np.float64) * P.height_scale_m
+    return None
+
+
+def _drive_energy_J(dh_m, d_m, P: EnergyParams):
+    """Battery energy for the grade-dependent part of one step (no roughness)."""
+    grade = (dh_m / d_m) if d_m > 0 else 0.0
+    grade = max(P.min_grade, min(P.max_grade, grade))
+
+    if -1e-3 < grade < 1e-3:
+        # Near-flat: sin(theta) ~ grade and cos(theta) ~ 1 to within 1e-6,
+        # so skip atan/sin/cos (most edges on plains land here).
+        sin_t = grade
+        cos_t = 1.0
+    else:
+        theta = math.atan(grade)
+        sin_t = math.sin(theta)
+        cos_t = abs(math.cos(theta))
+
+    mg = P._mg
+    F_grav_up = mg * max(0.0, sin_t)
+    F_roll = P._roll_flat * cos_t
+    E_mech_no_regen = (F_grav_up + F_roll) * d_m
+    E_grav_downhill = mg * max(0.0, -sin_t) * d_m
+    E_regen = P.downhill_regen_eff * E_grav_downhill
+
+    E_drive_in = E_mech_no_regen * P._inv_eta
+    return E_drive_in - E_regen
+
+
 def move_energy_J(u, v, layers, P: EnergyParams):
     (r0, c0), (r1, c1) = u, v
     if layers.blocked[r1, c1]:
@@ -55,31 +108,67 @@ def move_energy_J(u, v, layers, P: EnergyParams):
         )
         dh_m = dh_norm * P.height_scale_m
 
-    grade = (dh_m / d_m) if d_m > 0 else 0.0
-    grade = max(P.min_grade, min(P.max_grade, grade))
-    theta = math.atan(grade)
-
-    m, g = P.mass_kg, P.g
-    F_grav_up = m * g * max(0.0, math.sin(theta))
-    F_roll = P.Crr * m * g * abs(math.cos(theta))
-    E_mech_no_regen = (F_grav_up + F_roll) * d_m
-    E_grav_downhill = m * g * max(0.0, -math.sin(theta)) * d_m
-    E_regen = P.downhill_regen_eff * E_grav_downhill
-
     rough = float(layers.rough[r1, c1])
     E_rough = P.k_rough_J_per_m * rough * d_m
-    E_drive_in = E_mech_no_regen / P.eta
-    E_batt = E_drive_in + E_rough - E_regen
+    E_batt = _drive_energy_J(dh_m, d_m, P) + E_rough
     return max(0.0, E_batt)
 # endregion
 
 # region Cost Factory
+def energy_planes(layers, P: EnergyParams):
+    """
+    Edge energy for every (direction, destination) pair, vectorized over the
+    grid: E[dr + 1, dc + 1, r, c] is the battery energy of the step
+    (r - dr, c - dc) -> (r, c), clamped at zero. Same physics as
+    move_energy_J; the center plane and off-grid sources hold inf.
+    """
+    rough_J_per_m = P.k_rough_J_per_m * np.asarray(layers.rough, dtype=np.float64)
+    H, W = rough_J_per_m.shape
+    elev = _elevation_m(layers, P)
+    if elev is not None:
+        elev = np.asarray(elev, dtype=np.float64)
+
+    E = np.full((3, 3, H, W), np.inf, dtype=np.float32)
+    for dr in (-1, 0, 1):
+        for dc in (-1, 0, 1):
+            if dr == 0 and dc == 0:
+                continue
+            d_m = _grid_step_m(dr, dc, P.meters_per_cell)
+            # destination window and the matching source window
+            rd = slice(max(dr, 0), H + min(dr, 0))
+            cd = slice(max(dc, 0), W + min(dc, 0))
+            rs = slice(max(-dr, 0), H + min(-dr, 0))
+            cs = slice(max(-dc, 0), W + min(-dc, 0))
+
+            if elev is not None and d_m > 0:
+                grade = (elev[rd, cd] - elev[rs, cs]) / d_m
+            else:
+                grade = np.zeros_like(rough_J_per_m[rd, cd])
+            np.clip(grade, P.min_grade, P.max_grade, out=grade)
+            theta = np.arctan(grade)
+            sin_t = np.sin(theta)
+            cos_t = np.abs(np.cos(theta))
+
+            E_drive_in = (P._mg * np.maximum(0.0, sin_t) + P._roll_flat * cos_t) * d_m * P._inv_eta
+            E_regen = P.downhill_regen_eff * P._mg * np.maximum(0.0, -sin_t) * d_m
+            E_batt = E_drive_in - E_regen + rough_J_per_m[rd, cd] * d_m
+            E[dr + 1, dc + 1, rd, cd] = np.maximum(0.0, E_batt)
+    return E
+
+
 def physical_energy_cost_fn(layers, params: EnergyParams, scale_cost=1.0):
+    # Every edge's energy depends only on its direction and destination, so
+    # the whole table is built in one vectorized pass; an edge is a lookup.
+    blocked = np.asarray(layers.blocked, dtype=bool)
+    E = energy_planes(layers, params)
+    if scale_cost != 1.0:
+        E *= np.float32(scale_cost)
+
     def cost(u, v):
-        E = move_energy_J(u, v, layers, params)
-        if E is None:
+        (r0, c0), (r1, c1) = u, v
+        if blocked[r1, c1]:
             return None
-        return float(E * scale_cost)
+        return float(E[r1 - r0 + 1, c1 - c0 + 1, r1, c1])
 
     return cost
 # endregion
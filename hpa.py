@@ -0,0 +1,289 @@
+# region Imports
+import heapq
+import math
+from typing import Dict, List, Tuple
+import numpy as np
+from jit import njit
+from rover_astar_sim import _heap_pop, _heap_push, ids_to_rc
+from astar_numba import astar_numba
+# endregion
+
+# Cluster edge (cells) of the abstract graph; borders shared by two clusters
+# get one transition per short passable run and two for runs >= LONG_RUN.
+CLUSTER = 32
+LONG_RUN = 6
+
+# region Cluster Dijkstra
+@njit(cache=True)
+def _dijkstra_cluster(cost, r0, c0, Hr, Wr, src, steps, straight, diag, reverse):
+    # Exact costs from src to every cell of the cluster window, using the
+    # step * cost[dst] edge cost (+inf cells are blocked). With reverse the
+    # costs are *to* src (an edge u -> x is charged cost[x] when relaxing
+    # x's predecessor u).
+    N = Hr * Wr
+    g = np.full(N, np.inf, dtype=np.float64)
+    closed = np.zeros(N, dtype=np.uint8)
+    K = steps.shape[0]
+    cap = K * N + 1
+    hf = np.empty(cap, dtype=np.float64)
+    hc = np.empty(cap, dtype=np.int64)
+    hn = np.empty(cap, dtype=np.int32)
+    g[src] = 0.0
+    n = _heap_push(hf, hc, hn, 0, 0.0, 0, src)
+    counter = 0
+
+    while n > 0:
+        u, n = _heap_pop(hf, hc, hn, n)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        ur = u // Wr
+        uc = u % Wr
+        gu = g[u]
+        for k in range(K):
+            dr = steps[k, 0]
+            dc = steps[k, 1]
+            vr = ur + dr
+            vc = uc + dc
+            if vr < 0 or vr >= Hr or vc < 0 or vc >= Wr:
+                continue
+            p = cost[r0 + vr, c0 + vc]
+            if p == np.inf:
+                continue
+            v = vr * Wr + vc
+            if closed[v]:
+                continue
+            step = diag if (dr != 0 and dc != 0) else straight
+            if reverse:
+                p = cost[r0 + ur, c0 + uc]
+            alt = gu + step * float(p)
+            if alt < g[v]:
+                g[v] = alt
+                counter += 1
+                n = _heap_push(hf, hc, hn, n, alt, counter, v)
+    return g
+# endregion
+
+# region Abstract Graph
+class HPAGraph:
+    """
+    HPA*-style abstraction of a WeightedCost.cost_grid (edge u -> v costs
+    step_m * cost[v]; +inf cells are impassable). Built once per layer set;
+    find_path() answers legs by searching the small entrance graph and
+    refining each hop inside its cluster, which is near-optimal rather than
+    exact. With diagonal steps, border crossings also include the diagonal
+    moves that no straight transition can stand in for.
+    """
+
+    def __init__(
+        self,
+        cost: np.ndarray,
+        steps: np.ndarray,
+        meters_per_cell: float,
+        diag_cost: float = math.sqrt(2.0),
+        cluster: int = CLUSTER,
+    ):
+        self.cost = cost
+        self.blocked = ~np.isfinite(cost)
+        self.steps = np.ascontiguousarray(steps, dtype=np.int32)
+        self.straight = float(meters_per_cell)
+        self.diag = self.straight * float(diag_cost)
+        self.cluster = int(cluster)
+        self.H, self.W = self.blocked.shape
+        c_min = float(cost.min()) if cost.size else 0.0
+        self.h_scale = c_min if np.isfinite(c_min) else 0.0
+
+        # node id -> [(neighbour id, cost)], and cluster -> its entrance ids
+        self.edges: Dict[int, List[Tuple[int, float]]] = {}
+        self.entrances: Dict[Tuple[int, int], List[int]] = {}
+        self._build_transitions()
+        self._build_intra_edges()
+
+    # region Construction
+    def _cluster_of(self, r: int, c: int) -> Tuple[int, int]:
+        return r // self.cluster, c // self.cluster
+
+    def _bounds(self, key: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        cr, cc = key
+        r0, c0 = cr * self.cluster, cc * self.cluster
+        return r0, min(self.H, r0 + self.cluster) - 1, c0, min(self.W, c0 + self.cluster) - 1
+
+    def _add_transition(self, a: Tuple[int, int], b: Tuple[int, int], step: float):
+        W = self.W
+        ia, ib = a[0] * W + a[1], b[0] * W + b[1]
+        self.edges.setdefault(ia, []).append((ib, step * float(self.cost[b])))
+        self.edges.setdefault(ib, []).append((ia, step * float(self.cost[a])))
+        for node, rc in ((ia, a), (ib, b)):
+            ents = self.entrances.setdefault(self._cluster_of(*rc), [])
+            if node not in ents:
+                ents.append(node)
+
+    def _runs(self, ok: np.ndarray):
+        # (start, stop) of each maximal True run, split at cluster boundaries
+        C = self.cluster
+        i, n = 0, ok.size
+        while i < n:
+            if not ok[i]:
+                i += 1
+                continue
+            j = i
+            while j + 1 < n and ok[j + 1] and (j + 1) % C != 0:
+                j += 1
+            yield i, j
+            i = j + 1
+
+    def _build_transitions(self):
+        B = self.blocked
+        C = self.cluster
+        S, D = self.straight, self.diag
+        diag = bool(np.any((self.steps[:, 0] != 0) & (self.steps[:, 1] != 0)))
+        # vertical borders: (r, c - 1) | (r, c)
+        for c in range(C, self.W, C):
+            a, b = ~B[:, c - 1], ~B[:, c]
+            ok = a & b
+            for i, j in self._runs(ok):
+                for r in ((i, j) if j - i + 1 >= LONG_RUN else ((i + j) // 2,)):
+                    self._add_transition((r, c - 1), (r, c), S)
+            if diag:
+                # a diagonal crossing is only needed where neither straight
+                # pair next to it is open (otherwise a run already connects)
+                gap = ~ok[:-1] & ~ok[1:]
+                for r in np.flatnonzero(gap & a[:-1] & b[1:]).tolist():
+                    self._add_transition((r, c - 1), (r + 1, c), D)
+                for r in np.flatnonzero(gap & a[1:] & b[:-1]).tolist():
+                    self._add_transition((r + 1, c - 1), (r, c), D)
+        # horizontal borders: (r - 1, c) over (r, c)
+        for r in range(C, self.H, C):
+            a, b = ~B[r - 1, :], ~B[r, :]
+            ok = a & b
+            for i, j in self._runs(ok):
+                for c in ((i, j) if j - i + 1 >= LONG_RUN else ((i + j) // 2,)):
+                    self._add_transition((r - 1, c), (r, c), S)
+            if diag:
+                # pairs straddling a vertical border too were added above
+                gap = ~ok[:-1] & ~ok[1:]
+                gap[C - 1::C] = False
+                for c in np.flatnonzero(gap & a[:-1] & b[1:]).tolist():
+                    self._add_transition((r - 1, c), (r, c + 1), D)
+                for c in np.flatnonzero(gap & a[1:] & b[:-1]).tolist():
+                    self._add_transition((r - 1, c + 1), (r, c), D)
+
+    def _cluster_costs(self, key, r, c, reverse):
+        r0, r1, c0, c1 = self._bounds(key)
+        Wr = c1 - c0 + 1
+        g = _dijkstra_cluster(
+            self.cost, r0, c0, r1 - r0 + 1, Wr,
+            (r - r0) * Wr + (c - c0), self.steps, self.straight, self.diag, reverse,
+        )
+        return g, r0, c0, Wr
+
+    def _build_intra_edges(self):
+        W = self.W
+        for key, ents in self.entrances.items():
+            for e in ents:
+                g, r0, c0, Wr = self._cluster_costs(key, e // W, e % W, False)
+                out = self.edges.setdefault(e, [])
+                for f in ents:
+                    if f == e:
+                        continue
+                    d = g[(f // W - r0) * Wr + (f % W - c0)]
+                    if np.isfinite(d):
+                        out.append((f, float(d)))
+    # endregion
+
+    # region Query
+    def _h(self, i: int, goal: Tuple[int, int]) -> float:
+        ar = abs(i // self.W - goal[0])
+        ac = abs(i % self.W - goal[1])
+        if ar < ac:
+            ar, ac = ac, ar
+        if self.steps.shape[0] == 4:
+            return (ar + ac) * self.straight * self.h_scale
+        return (ar * self.straight + ac * (self.diag - self.straight)) * self.h_scale
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int], weight: float = 1.0):
+        """
+        Same return tuple as rover_astar_sim.astar (expansions are abstract
+        nodes, expanded_order an ids_to_rc array like the compiled searches).
+        """
+        if start == goal:
+            return [start], 0.0, 0, np.array([start], dtype=np.int32), None
+        W = self.W
+        s, t = start[0] * W + start[1], goal[0] * W + goal[1]
+        ks, kt = self._cluster_of(*start), self._cluster_of(*goal)
+
+        # region Insert Start and Goal
+        gs, r0, c0, Wr = self._cluster_costs(ks, start[0], start[1], False)
+        from_s = []
+        for e in self.entrances.get(ks, []):
+            d = gs[(e // W - r0) * Wr + (e % W - c0)]
+            if np.isfinite(d):
+                from_s.append((e, float(d)))
+        if ks == kt:
+            d = gs[(goal[0] - r0) * Wr + (goal[1] - c0)]
+            if np.isfinite(d):
+                from_s.append((t, float(d)))
+        gt, r0, c0, Wr = self._cluster_costs(kt, goal[0], goal[1], True)
+        into_t = {}
+        for e in self.entrances.get(kt, []):
+            d = gt[(e // W - r0) * Wr + (e % W - c0)]
+            if np.isfinite(d):
+                into_t[e] = float(d)
+        # endregion
+
+        # region Abstract A*
+        g = {s: 0.0}
+        parent = {s: -1}
+        closed = set()
+        openh = [(weight * self._h(s, goal), 0, s)]
+        counter = 0
+        expanded = []
+        while openh:
+            _, _, u = heapq.heappop(openh)
+            if u in closed:
+                continue
+            closed.add(u)
+            expanded.append(u)
+            if u == t:
+                break
+            gu = g[u]
+            nbrs = self.edges.get(u, [])
+            if u == s:
+                nbrs = from_s + nbrs
+            if u in into_t:
+                nbrs = nbrs + [(t, into_t[u])]
+            for v, c in nbrs:
+                alt = gu + c
+                if alt < g.get(v, math.inf):
+                    g[v] = alt
+                    parent[v] = u
+                    counter += 1
+                    heapq.heappush(openh, (alt + weight * self._h(v, goal), counter, v))
+        expanded = ids_to_rc(expanded, W)
+        if t not in closed:
+            return None, float("inf"), len(expanded), expanded, None
+        # endregion
+
+        # region Refinement
+        hops = []
+        v = t
+        while v >= 0:
+            hops.append(v)
+            v = parent[v]
+        hops.reverse()
+        path = [start]
+        for u, v in zip(hops, hops[1:]):
+            ur, uc, vr, vc = u // W, u % W, v // W, v % W
+            if self._cluster_of(ur, uc) != self._cluster_of(vr, vc):
+                path.append((vr, vc))  # border transition
+                continue
+            seg, *_ = astar_numba(
+                (ur, uc), (vr, vc), self.cost,
+                self._bounds(self._cluster_of(ur, uc)), self.steps,
+                meters_per_cell=self.straight, diag_cost=self.diag / self.straight,
+            )
+            path.extend(seg[1:])
+        # endregion
+        return path, g[t], len(expanded), expanded, None
+    # endregion
+# endregion
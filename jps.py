@@ -0,0 +1,228 @@
+# region Imports
+import math
+from typing import Optional, Tuple
+import numpy as np
+from jit import njit
+from rover_astar_sim import _heap_pop, _heap_push, ids_to_rc
+# endregion
+
+# region Jump Primitives
+# Jump Point Search (Harabor & Grastien) on an 8-connected grid where a
+# diagonal step only needs its destination free, so uniform straight/diagonal
+# costs make most neighbours symmetric and prunable.
+@njit(cache=True)
+def _free(blocked, r, c):
+    H, W = blocked.shape
+    return 0 <= r < H and 0 <= c < W and not blocked[r, c]
+
+
+@njit(cache=True)
+def _jump_straight(blocked, r, c, dr, dc, gr, gc):
+    # walk (dr, dc) (one of them zero) until the goal, a forced neighbour or
+    # a wall; returns the jump point as (r, c) or (-1, -1)
+    while True:
+        if not _free(blocked, r, c):
+            return -1, -1
+        if r == gr and c == gc:
+            return r, c
+        if dr != 0:
+            if (_free(blocked, r + dr, c + 1) and not _free(blocked, r, c + 1)) or \
+               (_free(blocked, r + dr, c - 1) and not _free(blocked, r, c - 1)):
+                return r, c
+        else:
+            if (_free(blocked, r + 1, c + dc) and not _free(blocked, r + 1, c)) or \
+               (_free(blocked, r - 1, c + dc) and not _free(blocked, r - 1, c)):
+                return r, c
+        r += dr
+        c += dc
+
+
+@njit(cache=True)
+def _jump(blocked, r, c, dr, dc, gr, gc):
+    if dr == 0 or dc == 0:
+        return _jump_straight(blocked, r, c, dr, dc, gr, gc)
+    while True:
+        if not _free(blocked, r, c):
+            return -1, -1
+        if r == gr and c == gc:
+            return r, c
+        if (_free(blocked, r + dr, c - dc) and not _free(blocked, r, c - dc)) or \
+           (_free(blocked, r - dr, c + dc) and not _free(blocked, r - dr, c)):
+            return r, c
+        # a diagonal cell is a jump point if either straight ray from it is
+        if _jump_straight(blocked, r, c + dc, 0, dc, gr, gc)[0] >= 0:
+            return r, c
+        if _jump_straight(blocked, r + dr, c, dr, 0, gr, gc)[0] >= 0:
+            return r, c
+        r += dr
+        c += dc
+
+
+@njit(cache=True)
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+@njit(cache=True)
+def _successor_dirs(blocked, r, c, pr, pc, out):
+    # pruned neighbour directions of (r, c) reached from parent (pr, pc);
+    # writes (dr, dc) rows into out and returns how many
+    n = 0
+    if pr < 0:
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr != 0 or dc != 0:
+                    out[n, 0] = dr
+                    out[n, 1] = dc
+                    n += 1
+        return n
+    dr = _sign(r - pr)
+    dc = _sign(c - pc)
+    if dr != 0 and dc != 0:
+        out[0, 0] = dr; out[0, 1] = 0
+        out[1, 0] = 0; out[1, 1] = dc
+        out[2, 0] = dr; out[2, 1] = dc
+        n = 3
+        if not _free(blocked, r, c - dc):
+            out[n, 0] = dr; out[n, 1] = -dc
+            n += 1
+        if not _free(blocked, r - dr, c):
+            out[n, 0] = -dr; out[n, 1] = dc
+            n += 1
+    elif dr != 0:
+        out[0, 0] = dr; out[0, 1] = 0
+        n = 1
+        if not _free(blocked, r, c + 1):
+            out[n, 0] = dr; out[n, 1] = 1
+            n += 1
+        if not _free(blocked, r, c - 1):
+            out[n, 0] = dr; out[n, 1] = -1
+            n += 1
+    else:
+        out[0, 0] = 0; out[0, 1] = dc
+        n = 1
+        if not _free(blocked, r + 1, c):
+            out[n, 0] = 1; out[n, 1] = dc
+            n += 1
+        if not _free(blocked, r - 1, c):
+            out[n, 0] = -1; out[n, 1] = dc
+            n += 1
+    return n
+# endregion
+
+# region Search Kernel
+@njit(cache=True)
+def _jps_nb(blocked, start, goal, straight, diag, weight):
+    H, W = blocked.shape
+    N = H * W
+    g = np.full(N, np.inf, dtype=np.float64)
+    parent = np.full(N, -1, dtype=np.int32)
+    closed = np.zeros(N, dtype=np.uint8)
+    order = np.empty(N, dtype=np.int32)
+    cap = 8 * N + 1
+    hf = np.empty(cap, dtype=np.float64)
+    hc = np.empty(cap, dtype=np.int64)
+    hn = np.empty(cap, dtype=np.int32)
+    dirs = np.empty((8, 2), dtype=np.int64)
+    dstep = diag - straight
+
+    gr = goal // W
+    gc = goal % W
+    g[start] = 0.0
+    n = _heap_push(hf, hc, hn, 0, 0.0, 0, start)
+    counter = 0
+    expansions = 0
+
+    while n > 0:
+        u, n = _heap_pop(hf, hc, hn, n)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        order[expansions] = u
+        expansions += 1
+        if u == goal:
+            break
+
+        ur = u // W
+        uc = u % W
+        p = parent[u]
+        pr = p // W if p >= 0 else -1
+        pc = p % W if p >= 0 else -1
+        k = _successor_dirs(blocked, ur, uc, pr, pc, dirs)
+        for i in range(k):
+            dr = dirs[i, 0]
+            dc = dirs[i, 1]
+            jr, jc = _jump(blocked, ur + dr, uc + dc, dr, dc, gr, gc)
+            if jr < 0:
+                continue
+            v = jr * W + jc
+            if closed[v]:
+                continue
+            ar = abs(jr - ur)
+            ac = abs(jc - uc)
+            alt = g[u] + max(ar, ac) * straight + min(ar, ac) * dstep
+            if alt < g[v] - 1e-12:
+                g[v] = alt
+                parent[v] = u
+                ar = abs(jr - gr)
+                ac = abs(jc - gc)
+                h = max(ar, ac) * straight + min(ar, ac) * dstep
+                counter += 1
+                n = _heap_push(hf, hc, hn, n, alt + weight * h, counter, v)
+
+    return g[goal], parent, order[:expansions], expansions
+# endregion
+
+# region Public Entry Point
+def jps(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    blocked: np.ndarray,
+    bounds: Optional[Tuple[int, int, int, int]] = None,
+    *,
+    meters_per_cell: float = 1.0,
+    diag_cost: float = math.sqrt(2.0),
+    weight: float = 1.0,
+):
+    """
+    Uniform-cost 8-connected search: straight steps cost meters_per_cell,
+    diagonals meters_per_cell * diag_cost, blocked cells are impassable and
+    the search stays in bounds = (rmin, rmax, cmin, cmax). Only jump points
+    are expanded; the returned path is the full cell-by-cell route.
+
+    Returns the same tuple as rover_astar_sim.astar (expanded_order lists
+    the expanded jump points).
+    """
+    if start == goal:
+        return [start], 0.0, 0, np.array([start], dtype=np.int32), None
+
+    H, W = blocked.shape
+    rmin, rmax, cmin, cmax = bounds if bounds is not None else (0, H - 1, 0, W - 1)
+    roi = np.ascontiguousarray(blocked[rmin:rmax + 1, cmin:cmax + 1], dtype=np.bool_)
+    Wr = roi.shape[1]
+    s = (start[0] - rmin) * Wr + (start[1] - cmin)
+    t = (goal[0] - rmin) * Wr + (goal[1] - cmin)
+
+    straight = float(meters_per_cell)
+    cost, parent, order, expansions = _jps_nb(
+        roi, s, t, straight, straight * float(diag_cost), float(weight)
+    )
+    expanded_order = ids_to_rc(order, Wr, rmin, cmin)
+    if not np.isfinite(cost):
+        return None, float("inf"), int(expansions), expanded_order, None
+
+    # jump points back to start, then fill in the straight/diagonal runs
+    jumps = []
+    v = t
+    while v >= 0:
+        jumps.append((v // Wr + rmin, v % Wr + cmin))
+        v = int(parent[v])
+    jumps.reverse()
+    path = [jumps[0]]
+    for (r0, c0), (r1, c1) in zip(jumps, jumps[1:]):
+        dr = (r1 > r0) - (r1 < r0)
+        dc = (c1 > c0) - (c1 < c0)
+        for i in range(1, max(abs(r1 - r0), abs(c1 - c0)) + 1):
+            path.append((r0 + i * dr, c0 + i * dc))
+    return path, float(cost), int(expansions), expanded_order, None
+# endregion
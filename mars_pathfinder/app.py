@@ -1,29 +1,29 @@
 # region Imports
 from __future__ import annotations
 from typing import List, Tuple, Optional, Any, Dict
-import io, requests, numpy as np
+import io, warnings, numpy as np
 from flask import Flask, request, jsonify, make_response
 from PIL import Image
-import rasterio
-from rasterio.windows import from_bounds
+from rasterio.errors import RasterioIOError
 from rasterio.enums import Resampling
 from rasterio.crs import CRS
 from rasterio.warp import transform as warp_transform
 
-from config import COG_URL, EDGE_TOL
-from geometry import km2deg_lat, km2deg_lon, horiz_dist_m
+from config import COG_URL, EDGE_TOL, PART_MAX_PX
+from geometry import km2deg_lat, km2deg_lon, horiz_dist_m_grid
 from models import GridSpec, Layers
-from grid import idx_to_rc, nearest_idx, rc_to_lonlat_factory
-from dem import read_dem_window
+from grid import idx_to_rc, lonlat_axes, nearest_idx
+from dem import cog_dataset, read_dem_window, read_part_window
 from metrics import compute_cell_metrics
-from astar_core import astar, neighbors_8
-from energy import EnergyParams, physical_energy_cost_fn
+from astar_core import astar_multileg, astar_table, neighbors_8, warmup
+from energy import EnergyParams, energy_cost_table, physical_energy_cost_fn
 from connectivity import nearest_unblocked
-from costs import edge_cost_factory
+from costs import edge_cost_factory, slope_cost_table
 # endregion
 
 # region Flask Setup
 app = Flask(__name__)
+warmup()
 # endregion
 
 # region CORS
@@ -32,16 +32,34 @@ def _cors(resp):
     resp.headers["Access-Control-Allow-Origin"] = "*"
     resp.headers["Access-Control-Allow-Headers"] = "*"
     resp.headers["Access-Control-Allow-Methods"] = "GET,POST,OPTIONS"
+    resp.headers["Access-Control-Expose-Headers"] = "X-Shape"
     resp.headers["Accept-Ranges"] = "bytes"
     return resp
 # endregion
 
+# region Error Handling
+@app.errorhandler(RasterioIOError)
+def _cog_unreachable(e):
+    # Any endpoint whose COG read fails reports it here; there is no
+    # separate reachability probe ahead of the read.
+    return jsonify({"error": f"COG read failed: {e}"}), 502
+# endregion
+
 # region Preview Endpoints
 @app.route("/", methods=["GET"])
 def root():
     return {"ok": True, "source_tif": COG_URL, "astar": "/astar/solve (POST JSON)"}
 
 
+# Preview encoders: fast zlib level for PNG (default 6 is ~3x slower for
+# ~10% smaller tiles), lossy WebP for the smallest payloads.
+_PART_FORMATS = {
+    "png": {"format": "PNG", "compress_level": 1},
+    "webp": {"format": "WEBP", "quality": 80, "method": 0},
+    "raw": None,
+}
+
+
 @app.route("/cog/part", methods=["GET"])
 def cog_part():
     bbox = request.args.get("bbox", "")
@@ -50,60 +68,46 @@ def cog_part():
     except Exception:
         return jsonify({"error": "bbox=minx,miny,maxx,maxy required"}), 400
 
-    W = int(request.args.get("width", "256"))
-    H = int(request.args.get("height", "256"))
+    W = min(max(int(request.args.get("width", "256")), 1), PART_MAX_PX)
+    H = min(max(int(request.args.get("height", "256")), 1), PART_MAX_PX)
     resampling = getattr(
         Resampling,
         request.args.get("resampling", "nearest").lower(),
         Resampling.nearest,
     )
+    fmt = request.args.get("format", "png").lower()
+    if fmt not in _PART_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(_PART_FORMATS)}"}), 400
 
-    try:
-        r = requests.head(COG_URL, timeout=5)
-        if r.status_code != 200:
-            return jsonify({"error": "Remote COG not reachable"}), 502
-    except Exception as e:
-        return jsonify({"error": f"COG check failed: {e}"}), 502
+    arr = read_part_window(minx, miny, maxx, maxy, H, W, resampling)
 
-    with rasterio.open(COG_URL) as ds:
-        if ds.crs and ds.crs != CRS.from_epsg(4326):
-            xs, ys = warp_transform(
-                CRS.from_epsg(4326), ds.crs, [minx, maxx], [miny, maxy]
-            )
-            minx_ds, maxx_ds = min(xs), max(xs)
-            miny_ds, maxy_ds = min(ys), max(ys)
-        else:
-            minx_ds, miny_ds, maxx_ds, maxy_ds = minx, miny, maxx, maxy
-
-        win = from_bounds(minx_ds, miny_ds, maxx_ds, maxy_ds, ds.transform)
-        arr = (
-            ds.read(
-                1,
-                window=win,
-                out_shape=(H, W),
-                resampling=resampling,
-                boundless=True,
-                fill_value=np.nan,
-            )
-            .astype("float64")
-        )
-
-    valid = arr[np.isfinite(arr)]
-    if valid.size == 0:
-        lo, hi = 0.0, 1.0
-    else:
-        lo, hi = np.percentile(valid, [2, 98])
+    # NaN-aware percentiles on the window itself; all-NaN yields NaN (with a
+    # RuntimeWarning we don't need), which falls through to the min/max path.
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lo, hi = (float(v) for v in np.nanpercentile(arr, [2, 98]))
         if not np.isfinite(lo) or not np.isfinite(hi) or hi <= lo:
-            lo, hi = float(np.nanmin(valid)), float(np.nanmax(valid))
-            if not np.isfinite(lo) or not np.isfinite(hi) or hi <= lo:
-                lo, hi = 0.0, 1.0
+            lo, hi = float(np.nanmin(arr)), float(np.nanmax(arr))
+    if not np.isfinite(lo) or not np.isfinite(hi) or hi <= lo:
+        lo, hi = 0.0, 1.0
+
+    # arr is shared with the read cache, so scale into a fresh buffer
+    scaled = arr - lo
+    scaled *= 255.0 / max(hi - lo, 1e-6)
+    np.clip(scaled, 0, 255, out=scaled)
+    gray = scaled.astype(np.uint8)
+
+    # raw: row-major uint8 bytes for the client to paint itself, no encode
+    if fmt == "raw":
+        resp = make_response(gray.tobytes())
+        resp.headers["Content-Type"] = "application/octet-stream"
+        resp.headers["X-Shape"] = f"{H},{W}"
+        return resp
 
-    scaled = np.clip((arr - lo) / max(hi - lo, 1e-6), 0, 1)
     buf = io.BytesIO()
-    Image.fromarray((scaled * 255).astype("uint8"), "L").save(buf, "PNG")
-    buf.seek(0)
-    resp = make_response(buf.read())
-    resp.headers["Content-Type"] = "image/png"
+    Image.fromarray(gray, "L").save(buf, **_PART_FORMATS[fmt])
+    resp = make_response(buf.getvalue())
+    resp.headers["Content-Type"] = f"image/{fmt}"
     return resp
 
 
@@ -115,14 +119,7 @@ def cog_point():
     except Exception:
         return jsonify({"error": "lon and lat required"}), 400
 
-    try:
-        r = requests.head(COG_URL, timeout=5)
-        if r.status_code != 200:
-            return jsonify({"error": "Remote COG not reachable"}), 502
-    except Exception as e:
-        return jsonify({"error": f"COG check failed: {e}"}), 502
-
-    with rasterio.open(COG_URL) as ds:
+    with cog_dataset() as ds:
         xy = (lon, lat)
         if ds.crs and ds.crs != CRS.from_epsg(4326):
             xs, ys = warp_transform(CRS.from_epsg(4326), ds.crs, [lon], [lat])
@@ -140,13 +137,6 @@ def astar_solve():
     """
     Manual A* pathfinding request body and behavior.
     """
-    try:
-        r = requests.head(COG_URL, timeout=5)
-        if r.status_code != 200:
-            return jsonify({"error": "Remote COG not reachable"}), 502
-    except Exception as e:
-        return jsonify({"error": f"COG check failed: {e}"}), 502
-
     data = request.get_json(force=True, silent=True) or {}
     pts = data.get("positions") or []
     if len(pts) < 2:
@@ -201,47 +191,67 @@ def astar_solve():
     # region Layers and Blocking
     blocked = slope_grade > max_grade
     layers = Layers(
-        elevation_m=elev.astype(np.float32), rough=rough, blocked=blocked
+        elevation_m=elev.astype(np.float32, copy=False), rough=rough, blocked=blocked
     )
     H, W = N, N
-    rc_to_lonlat = rc_to_lonlat_factory(spec)
+    xs, ys = lonlat_axes(spec)
     # endregion
 
     # region Neighborhood + Heuristic
     def neigh(u):
         return neighbors_8(u, H, W)
 
+    # Distance-to-goal is filled in once per goal as a dense table, so the
+    # heuristic is a list lookup instead of trig on every push.
+    h_rows: List[List[float]] = []
+    h_goal: List[Optional[Tuple[int, int]]] = [None]
+
     def h_m(u, g):
-        ulon, ulat = rc_to_lonlat(u[0], u[1])
-        glon, glat = rc_to_lonlat(g[0], g[1])
-        return horiz_dist_m(ulon, ulat, glon, glat)
+        if g != h_goal[0]:
+            h_rows[:] = horiz_dist_m_grid(
+                xs[None, :], ys[:, None], float(xs[g[1]]), float(ys[g[0]])
+            ).tolist()
+            h_goal[0] = g
+        return h_rows[u[0]][u[1]]
     # endregion
 
     # region Edge cost configuration
+    # Searches without beam/epsilon/time limits run entirely in the compiled
+    # table-driven kernel, with the edge costs resolved up front for this
+    # parameter set; everything else uses the callback A*.
+    exact = epsilon is None and beam_width is None and max_time is None
+    cost_table = None
+    edge_cost = None
     if cost_mode == "energy":
         params = EnergyParams(meters_per_cell=meters_per_cell)
-        edge_cost = physical_energy_cost_fn(layers, params, scale_cost=1.0)
+        if exact:
+            cost_table = energy_cost_table(layers, params)
+        else:
+            edge_cost = physical_energy_cost_fn(layers, params, scale_cost=1.0)
+    elif exact:
+        cost_table = slope_cost_table(
+            layers, slope_weight=slope_w, max_grade=max_grade,
+            lon_axis=xs, lat_axis=ys,
+        )
     else:
         edge_cost = edge_cost_factory(
             cost_mode="slope",
             layers=layers,
             slope_weight=slope_w,
             max_grade=max_grade,
-            rc_to_lonlat=rc_to_lonlat,
+            lon_axis=xs,
+            lat_axis=ys,
             meters_per_cell=meters_per_cell,
         )
     # endregion
 
     # region Waypoint mapping
-    way_rc: List[Tuple[int, int]] = []
-    start_blocked_flags: List[bool] = []
-    for lon, lat in zip(lons, lats):
-        i = nearest_idx(lon, lat, spec)
-        rc = idx_to_rc(i, W)
-        was_blocked = bool(layers.blocked[rc[0], rc[1]])
-        rc = nearest_unblocked(rc, layers.blocked, max_radius=25)
-        start_blocked_flags.append(was_blocked)
-        way_rc.append(rc)
+    way_rc: List[Tuple[int, int]] = [idx_to_rc(nearest_idx(lon, lat, spec), W)
+                                     for lon, lat in zip(lons, lats)]
+    start_blocked_flags: List[bool] = [bool(layers.blocked[rc]) for rc in way_rc]
+    for k, rc in enumerate(way_rc):
+        if start_blocked_flags[k]:
+            way_rc[k] = nearest_unblocked(rc, layers.blocked, max_radius=25)
     # endregion
 
     # region Per‑leg A* execution
@@ -249,20 +259,31 @@ def astar_solve():
     legs_cost: List[float] = []
     totals = 0.0
 
-    for i in range(len(way_rc) - 1):
-        s_rc, t_rc = way_rc[i], way_rc[i + 1]
-        path, cost, *_ = astar(
-            start=s_rc,
-            goal=t_rc,
+    if cost_table is not None:
+        legs = []
+        for s_rc, t_rc in zip(way_rc[:-1], way_rc[1:]):
+            legs.append(
+                astar_table(
+                    s_rc, t_rc, cost_table, meters_per_cell,
+                    weight=weight, max_expansions=max_exp,
+                )
+            )
+            if legs[-1][0] is None:
+                break
+    else:
+        legs = astar_multileg(
+            list(zip(way_rc[:-1], way_rc[1:])),
             neighbors_fn=neigh,
             edge_cost_fn=edge_cost,
             heuristic_fn=h_m,
+            shape=(H, W),
             weight=weight,
             epsilon=epsilon,
             max_expansions=max_exp,
             max_time_sec=max_time,
             beam_width=beam_width,
         )
+    for i, (path, cost, *_) in enumerate(legs):
         if path is None:
             diag = {
                 "leg": i + 1,
@@ -290,7 +311,7 @@ def astar_solve():
 
     # region Output mapping
     positions = [
-        {"lon": float(rc_to_lonlat(r, c)[0]), "lat": float(rc_to_lonlat(r, c)[1])}
+        {"lon": float(xs[c]), "lat": float(ys[r])}
         for (r, c) in path_rc
     ]
     resp = {"positions": positions}
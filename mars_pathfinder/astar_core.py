@@ -1,8 +1,19 @@
 # region Imports and Typing
 from typing import Tuple, Optional, Callable, Any, List, Dict
 import math, heapq, time
+import numpy as np
+from jit import HAVE_NUMBA, njit
 # endregion
 
+SQRT2 = math.sqrt(2.0)
+BEAM_SLACK = 4
+
+# 8-neighborhood offsets, same order as neighbors_8
+DR = np.array([-1, -1, -1, 0, 0, 1, 1, 1], dtype=np.int8)
+DC = np.array([-1, 0, 1, -1, 1, -1, 0, 1], dtype=np.int8)
+# direction index k for a step, looked up by (dr + 1) * 3 + (dc + 1)
+DIR_K = (0, 1, 2, 3, -1, 4, 5, 6, 7)
+
 # region Neighbor Generation
 def neighbors_8(u, H, W):
     r, c = u
@@ -24,6 +35,35 @@ def reconstruct(parent, goal):
         v = parent.get(v)
     path.reverse()
     return path
+
+
+def reconstruct_idx(parent, goal_idx: int, W: int) -> List[Tuple[int, int]]:
+    """Walk a flat predecessor array (-1 terminated) back from goal_idx."""
+    path = []
+    v = goal_idx
+    while v >= 0:
+        path.append((v // W, v % W))
+        v = parent[v]
+    path.reverse()
+    return path
+
+
+@njit(cache=True)
+def _reconstruct_nb(parent, goal_idx, W):
+    # two walks up the predecessor chain: count, then fill back to front so
+    # the (n, 2) rows come out start-first without a reverse
+    n = 0
+    v = goal_idx
+    while v >= 0:
+        n += 1
+        v = parent[v]
+    rc = np.empty((n, 2), dtype=np.int32)
+    v = goal_idx
+    for i in range(n - 1, -1, -1):
+        rc[i, 0] = v // W
+        rc[i, 1] = v % W
+        v = parent[v]
+    return rc
 # endregion
 
 # region A* Algorithm
@@ -34,23 +74,35 @@ def astar(
     edge_cost_fn: Callable[[Tuple[int, int], Tuple[int, int]], Optional[float]],
     heuristic_fn: Callable[[Tuple[int, int], Tuple[int, int]], float],
     *,
+    shape: Tuple[int, int],
     weight: float = 1.0,
     epsilon: Optional[float] = None,
     max_expansions: Optional[int] = None,
     max_time_sec: Optional[float] = None,
     beam_width: Optional[int] = None,
 ):
+    """
+    Generic A* over (r, c) nodes of an H x W grid (shape). Search state is
+    kept in flat per-cell storage indexed by r * W + c instead of dicts.
+    """
     if start == goal:
         return [start], 0.0, 0, [start], None
 
+    H, W = shape
+    N = H * W
+
     t0 = time.time()
     counter = 0
     openh: List[Tuple[float, float, int, Tuple[int, int]]] = []
     h0 = heuristic_fn(start, goal)
     heapq.heappush(openh, (h0 * weight, h0, counter, start))
-    g = {start: 0.0}
-    parent = {start: None}
-    closed = set()
+    # Plain lists/bytearray: from interpreted code these index faster than
+    # NumPy arrays, which box a scalar on every element access.
+    inf = float("inf")
+    g = [inf] * N
+    parent = [-1] * N
+    closed = bytearray(N)
+    g[start[0] * W + start[1]] = 0.0
     expansions = 0
     expanded_order = []
     best_goal_cost = None
@@ -61,7 +113,7 @@ def astar(
         if max_time_sec is not None and (time.time() - t0) > max_time_sec:
             if best_goal_node is not None:
                 return (
-                    reconstruct(parent, best_goal_node),
+                    reconstruct_idx(parent, best_goal_node, W),
                     best_goal_cost,
                     expansions,
                     expanded_order,
@@ -74,52 +126,242 @@ def astar(
 
         if epsilon is not None and best_goal_cost is not None:
             if best_goal_cost <= (1.0 + epsilon) * f:
-                return reconstruct(parent, best_goal_node), best_goal_cost, expansions, expanded_order, None
+                return reconstruct_idx(parent, best_goal_node, W), best_goal_cost, expansions, expanded_order, None
 
-        if u in closed:
+        ui = u[0] * W + u[1]
+        if closed[ui]:
             continue
-        closed.add(u)
+        closed[ui] = 1
         expanded_order.append(u)
         expansions += 1
 
         # region Expansion Limits
         if max_expansions is not None and expansions >= max_expansions:
             if best_goal_node is not None:
-                return reconstruct(parent, best_goal_node), best_goal_cost, expansions, expanded_order, None
+                return reconstruct_idx(parent, best_goal_node, W), best_goal_cost, expansions, expanded_order, None
             return None, float("inf"), expansions, expanded_order, None
         # endregion
 
         if u == goal:
-            return reconstruct(parent, u), g[u], expansions, expanded_order, None
+            return reconstruct_idx(parent, ui, W), g[ui], expansions, expanded_order, None
 
-        gu = g[u]
+        gu = g[ui]
         # region Neighbor Loop
         for v in neighbors_fn(u):
             c = edge_cost_fn(u, v)
             if c is None:
                 continue
             alt = gu + c
-            if v in closed:
+            vi = v[0] * W + v[1]
+            if closed[vi]:
                 continue
-            old = g.get(v)
-            if old is None or alt < old - 1e-12:
-                g[v] = alt
-                parent[v] = u
+            if alt < g[vi] - 1e-12:
+                g[vi] = alt
+                parent[vi] = ui
                 hv = heuristic_fn(v, goal)
                 counter += 1
                 heapq.heappush(openh, (alt + weight * hv, hv, counter, v))
                 if v == goal and (best_goal_cost is None or alt < best_goal_cost - 1e-12):
                     best_goal_cost = alt
-                    best_goal_node = v
+                    best_goal_node = vi
         # endregion
 
         # region Beam‑width Pruning
-        if beam_width is not None and len(openh) > beam_width:
-            openh = heapq.nsmallest(beam_width, openh)
+        # Let the frontier overshoot to BEAM_SLACK * beam_width before cutting
+        # it back, so the O(N) partition is amortized over many pushes.
+        if beam_width is not None and len(openh) > BEAM_SLACK * beam_width:
+            keys = np.fromiter((e[0] for e in openh), dtype=np.float64, count=len(openh))
+            keep = np.argpartition(keys, beam_width - 1)[:beam_width]
+            openh = [openh[i] for i in keep.tolist()]
             heapq.heapify(openh)
         # endregion
 
     if best_goal_node is not None:
-        return reconstruct(parent, best_goal_node), best_goal_cost, expansions, expanded_order, None
+        return reconstruct_idx(parent, best_goal_node, W), best_goal_cost, expansions, expanded_order, None
     return None, float("inf"), expansions, expanded_order, None
-# endregion
\ No newline at end of file
+# endregion
+
+# region Multi-leg Search
+def astar_multileg(
+    legs: List[Tuple[Tuple[int, int], Tuple[int, int]]],
+    neighbors_fn: Callable[[Tuple[int, int]], Any],
+    edge_cost_fn: Callable[[Tuple[int, int], Tuple[int, int]], Optional[float]],
+    heuristic_fn: Callable[[Tuple[int, int], Tuple[int, int]], float],
+    *,
+    shape: Tuple[int, int],
+    **search_kw,
+):
+    """
+    Solve consecutive (start, goal) legs, returning one astar()-style tuple
+    per leg and stopping after the first leg with no path.
+    """
+    results = []
+    for s, t in legs:
+        res = astar(
+            s, t, neighbors_fn, edge_cost_fn, heuristic_fn,
+            shape=shape, **search_kw,
+        )
+        results.append(res)
+        if res[0] is None:
+            break
+    return results
+# endregion
+
+# region Array-backed Heap
+@njit(cache=True)
+def _heap_push(keys, nodes, n, key, node):
+    i = n
+    while i > 0:
+        p = (i - 1) >> 1
+        if keys[p] <= key:
+            break
+        keys[i] = keys[p]
+        nodes[i] = nodes[p]
+        i = p
+    keys[i] = key
+    nodes[i] = node
+    return n + 1
+
+
+@njit(cache=True)
+def _heap_pop(keys, nodes, n):
+    key = keys[0]
+    node = nodes[0]
+    n -= 1
+    last_k = keys[n]
+    last_n = nodes[n]
+    i = 0
+    while True:
+        c = 2 * i + 1
+        if c >= n:
+            break
+        if c + 1 < n and keys[c + 1] < keys[c]:
+            c += 1
+        if keys[c] >= last_k:
+            break
+        keys[i] = keys[c]
+        nodes[i] = nodes[c]
+        i = c
+    if n > 0:
+        keys[i] = last_k
+        nodes[i] = last_n
+    return key, node, n
+# endregion
+
+# region Edge-table A*
+@njit(cache=True)
+def _astar_table_nb(H, W, start_idx, goal_idx, cost, h_scale, diag, weight, max_expansions):
+    N = H * W
+    g = np.full(N, np.inf, dtype=np.float64)
+    parent = np.full(N, -1, dtype=np.int32)
+    closed = np.zeros(N, dtype=np.uint8)
+    order = np.empty(N, dtype=np.int32)
+    cap = 8 * N + 1
+    heap_k = np.empty(cap, dtype=np.float64)
+    heap_n = np.empty(cap, dtype=np.int32)
+
+    goal_r = goal_idx // W
+    goal_c = goal_idx % W
+    g[start_idx] = 0.0
+    n = _heap_push(heap_k, heap_n, 0, 0.0, start_idx)
+    expansions = 0
+
+    while n > 0:
+        _, u, n = _heap_pop(heap_k, heap_n, n)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        order[expansions] = u
+        expansions += 1
+        if u == goal_idx:
+            break
+        if max_expansions > 0 and expansions >= max_expansions:
+            break
+
+        ur = u // W
+        uc = u % W
+        gu = g[u]
+        for k in range(8):
+            c = cost[ur, uc, k]
+            if c == np.inf:
+                continue
+            vr = ur + DR[k]
+            vc = uc + DC[k]
+            # a table with finite off-grid entries must not index past g/parent
+            if vr < 0 or vr >= H or vc < 0 or vc >= W:
+                continue
+            v = vr * W + vc
+            if closed[v]:
+                continue
+            alt = gu + c
+            if alt < g[v]:
+                g[v] = alt
+                parent[v] = u
+                ar = abs(vr - goal_r)
+                ac = abs(vc - goal_c)
+                h = (max(ar, ac) + (diag - 1.0) * min(ar, ac)) * h_scale
+                n = _heap_push(heap_k, heap_n, n, alt + weight * h, v)
+
+    return g[goal_idx], parent, order[:expansions], expansions
+
+
+def astar_table(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    cost: np.ndarray,
+    meters_per_cell: float,
+    *,
+    diag: float = SQRT2,
+    weight: float = 1.0,
+    max_expansions: Optional[int] = None,
+):
+    """
+    8-connected A* over a precomputed (H, W, 8) edge cost table in DR/DC
+    direction order, +inf marking missing edges (energy.energy_cost_table).
+    The heuristic is octile distance times the cheapest cost per meter in
+    the table. Returns the same tuple as astar().
+    """
+    if start == goal:
+        return [start], 0.0, 0, [start], None
+
+    H, W, _ = cost.shape
+    cost = np.ascontiguousarray(cost, dtype=np.float32)
+    per_m = math.inf
+    for k in range(8):
+        step_m = meters_per_cell * (diag if (DR[k] != 0 and DC[k] != 0) else 1.0)
+        ck = cost[:, :, k]
+        finite = ck[np.isfinite(ck)]
+        if finite.size and step_m > 0:
+            per_m = min(per_m, float(finite.min()) / step_m)
+    h_scale = per_m * meters_per_cell if math.isfinite(per_m) else 0.0
+
+    c, parent, order, expansions = _astar_table_nb(
+        H, W,
+        start[0] * W + start[1],
+        goal[0] * W + goal[1],
+        cost, max(0.0, h_scale), float(diag), float(weight),
+        int(max_expansions or 0),
+    )
+    expanded_order = list(zip((order // W).tolist(), (order % W).tolist()))
+    if not np.isfinite(c):
+        return None, float("inf"), int(expansions), expanded_order, None
+    path = list(map(tuple, _reconstruct_nb(parent, goal[0] * W + goal[1], W).tolist()))
+    return path, float(c), int(expansions), expanded_order, None
+# endregion
+
+# region Warmup
+def warmup() -> None:
+    """
+    Compile (or load from the on-disk numba cache) the astar_table kernel
+    that astar_solve runs, so the first request doesn't pay for JIT.
+    """
+    if not HAVE_NUMBA:
+        return
+    # a valid edge table: off-grid directions are +inf like energy_cost_table's
+    table = np.ones((4, 4, 8), dtype=np.float32)
+    rr, cc = np.mgrid[0:4, 0:4]
+    for k in range(8):
+        vr, vc = rr + DR[k], cc + DC[k]
+        table[(vr < 0) | (vr >= 4) | (vc < 0) | (vc >= 4), k] = np.inf
+    astar_table((0, 0), (3, 3), table, 1.0)
+# endregion
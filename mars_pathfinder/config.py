@@ -1,6 +1,25 @@
 # region Mars Configuration
 COG_URL = "http://45.76.227.0:8081/mars_6p25_wgs84_cog.tif"
 MARS_R = 3_390_000.0  # Mars mean radius (m)
+
+# GDAL options for the shared COG handle (block cache, larger HTTP range
+# reads, VSI read cache, HTTP/2 multiplexing, no sidecar directory listing)
+COG_ENV = {
+    "GDAL_CACHEMAX": 512,
+    "CPL_VSIL_CURL_CHUNK_SIZE": 1_048_576,
+    "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif",
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "VSI_CACHE": "TRUE",
+    "VSI_CACHE_SIZE": 67_108_864,
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "GDAL_HTTP_VERSION": "2",
+}
+
+# Decoded /cog/part windows kept in memory (pan/zoom re-requests tiles);
+# width/height are clamped to PART_MAX_PX so the cache stays under
+# PART_CACHE_SIZE * PART_MAX_PX**2 float32s (128 MB)
+PART_CACHE_SIZE = 32
+PART_MAX_PX = 1024
 # endregion
 
 # region Edge and Slope Tolerance
@@ -1,35 +1,41 @@
 # region Imports
+from functools import lru_cache
 from typing import Tuple
 import numpy as np
 # endregion
 
 # region Nearest Unblocked Cell Search
+@lru_cache(maxsize=8)
+def _dd_template(R: int) -> np.ndarray:
+    """Squared distances from the center of a (2R+1)^2 square."""
+    d = np.arange(-R, R + 1, dtype=np.int32)
+    dd = d[:, None] * d[:, None] + d[None, :] * d[None, :]
+    dd.flags.writeable = False
+    return dd
+
+
 def nearest_unblocked(
     rc: Tuple[int, int],
     blocked: np.ndarray,
     max_radius: int = 25
 ) -> Tuple[int, int]:
+    """
+    Closest free cell (Euclidean, first in row-major order on ties) within
+    the (2*max_radius+1)^2 square around rc; rc itself if none is free.
+    """
     r, c = rc
     H, W = blocked.shape
 
     if not blocked[r, c]:
         return rc
 
-    best = None
-    best_d2 = 1e18
-
-    for rad in range(1, max_radius + 1):
-        r0, r1 = max(0, r - rad), min(H - 1, r + rad)
-        c0, c1 = max(0, c - rad), min(W - 1, c + rad)
-        for rr in range(r0, r1 + 1):
-            for cc in range(c0, c1 + 1):
-                if not blocked[rr, cc]:
-                    d2 = (rr - r) * (rr - r) + (cc - c) * (cc - c)
-                    if d2 < best_d2:
-                        best = (rr, cc)
-                        best_d2 = d2
-        if best is not None:
-            return best
-
-    return rc
-# endregion
\ No newline at end of file
+    R = int(max_radius)
+    r0, r1 = max(0, r - R), min(H, r + R + 1)
+    c0, c1 = max(0, c - R), min(W, c + R + 1)
+    dd = _dd_template(R)[r0 - r + R:r1 - r + R, c0 - c + R:c1 - c + R]
+    masked = np.where(blocked[r0:r1, c0:c1], np.iinfo(np.int32).max, dd)
+    k = int(np.argmin(masked))
+    if masked.flat[k] == np.iinfo(np.int32).max:
+        return rc
+    return (r0 + k // masked.shape[1], c0 + k % masked.shape[1])
+# endregion
@@ -1,7 +1,9 @@
 # region Imports
-from typing import Tuple, Optional, Callable
+from typing import Tuple, Optional, Sequence
+import numpy as np
 from models import Layers
-from geometry import horiz_dist_m
+from astar_core import DR, DC, DIR_K
+from geometry import edge_length_table
 from config import EDGE_TOL
 # endregion
 
@@ -11,32 +13,103 @@ def edge_cost_factory(
     layers: Layers,
     slope_weight: float,
     max_grade: float,
-    rc_to_lonlat: Callable[[int, int], Tuple[float, float]],
+    lon_axis: Sequence[float],
+    lat_axis: Sequence[float],
     meters_per_cell: float,
 ):
+    """
+    Slope-weighted distance cost. lon_axis / lat_axis are the grid's column
+    longitudes and row latitudes (grid.lonlat_axes), so a cell's position is
+    lon_axis[c], lat_axis[r].
+    """
     if cost_mode == "energy":
         raise RuntimeError("Use energy.physical_energy_cost_fn for energy mode.")
 
+    # Step lengths only vary by row and direction; nested float lists index
+    # faster than NumPy scalars from Python.
+    step_tab = edge_length_table(lon_axis, lat_axis)
+    step_m = step_tab.tolist()
+    elev = np.asarray(layers.elevation_m, dtype=np.float64)
+    # Blocked destinations, degenerate steps and the grade limit are all
+    # static for the run, so they collapse into one feasibility bit per edge.
+    pas = passable_mask(elev, layers.blocked, max_grade, step_tab).tolist()
+    elev = elev.tolist()
+
     # region Edge‑cost Function
     def edge_cost(u: Tuple[int, int], v: Tuple[int, int]) -> Optional[float]:
         r0, c0 = u
         r1, c1 = v
-        if layers.blocked[r1, c1]:
+        i = (r1 - r0 + 1) * 3 + (c1 - c0 + 1)
+        if not (pas[r0][c0] >> DIR_K[i]) & 1:
             return None
+        hd = step_m[r0][r1 - r0 + 1][c1 - c0 + 1]
+        # hd * (1 + slope_weight * |dh| / hd)
+        return hd + slope_weight * abs(elev[r1][c1] - elev[r0][c0])
+    # endregion
 
-        lon0, lat0 = rc_to_lonlat(r0, c0)
-        lon1, lat1 = rc_to_lonlat(r1, c1)
-        hd = horiz_dist_m(lon0, lat0, lon1, lat1)
-        if hd <= 1e-6:
-            return None
+    return edge_cost
+# endregion
 
-        dh = float(layers.elevation_m[r1, c1] - layers.elevation_m[r0, c0])
-        grade = abs(dh) / hd
-        if grade > (max_grade * EDGE_TOL):
-            return None
+# region Edge Feasibility
+def passable_mask(elev, blocked, max_grade: float, step_m: np.ndarray) -> np.ndarray:
+    """
+    Bit k of P[r, c] is set when the step (r, c) -> (r + DR[k], c + DC[k])
+    stays on the grid, lands on an unblocked cell, has a non-degenerate
+    length in step_m (geometry.edge_length_table) and a grade within
+    max_grade * EDGE_TOL. Shape (H, W), uint8.
+    """
+    elev = np.asarray(elev, dtype=np.float64)
+    blocked = np.asarray(blocked, dtype=bool)
+    H, W = elev.shape
+    limit = max_grade * EDGE_TOL
 
-        return hd * (1.0 + slope_weight * grade)
-    # endregion
+    P = np.zeros((H, W), dtype=np.uint8)
+    for k in range(8):
+        dr, dc = int(DR[k]), int(DC[k])
+        rs = slice(max(-dr, 0), H - max(dr, 0))
+        cs = slice(max(-dc, 0), W - max(dc, 0))
+        rd = slice(max(dr, 0), H + min(dr, 0))
+        cd = slice(max(dc, 0), W + min(dc, 0))
 
-    return edge_cost
-# endregion
\ No newline at end of file
+        hd = step_m[rs, dr + 1, dc + 1][:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grade = np.abs(elev[rd, cd] - elev[rs, cs]) / hd
+        ok = ~blocked[rd, cd] & (hd > 1e-6) & (grade <= limit)
+        P[rs, cs] |= ok.astype(np.uint8) << k
+    return P
+# endregion
+
+# region Edge Cost Table
+def slope_cost_table(
+    layers: Layers,
+    slope_weight: float,
+    max_grade: float,
+    lon_axis: Sequence[float],
+    lat_axis: Sequence[float],
+) -> np.ndarray:
+    """
+    edge_cost_factory's cost for every edge at once, specialized to one
+    (slope_weight, max_grade): C[r, c, k] is the cost of (r, c) ->
+    (r + DR[k], c + DC[k]), or +inf where edge_cost would return None or
+    the step leaves the grid. Shape (H, W, 8), float32, for astar_table.
+    """
+    elev = np.asarray(layers.elevation_m, dtype=np.float64)
+    H, W = elev.shape
+    step_m = edge_length_table(lon_axis, lat_axis)
+    P = passable_mask(elev, layers.blocked, max_grade, step_m)
+
+    C = np.full((H, W, 8), np.inf, dtype=np.float32)
+    for k in range(8):
+        dr, dc = int(DR[k]), int(DC[k])
+        # source window and the matching destination window
+        rs = slice(max(-dr, 0), H - max(dr, 0))
+        cs = slice(max(-dc, 0), W - max(dc, 0))
+        rd = slice(max(dr, 0), H + min(dr, 0))
+        cd = slice(max(dc, 0), W + min(dc, 0))
+
+        hd = step_m[rs, dr + 1, dc + 1][:, None]
+        cost = hd + slope_weight * np.abs(elev[rd, cd] - elev[rs, cs])
+        ok = (P[rs, cs] >> k) & 1
+        C[rs, cs, k] = np.where(ok, cost, np.inf)
+    return C
+# endregion
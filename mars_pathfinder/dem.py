@@ -1,4 +1,7 @@
 # region Imports
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 import numpy as np
 import rasterio
 from rasterio.windows import from_bounds
@@ -6,29 +9,121 @@ from rasterio.enums import Resampling
 from rasterio.crs import CRS
 from rasterio.warp import transform as warp_transform
 from models import GridSpec
-from config import COG_URL, AUTO_MIN_M, AUTO_MAX_M
+from jit import HAVE_NUMBA, njit, prange
+from config import COG_URL, COG_ENV, PART_CACHE_SIZE, AUTO_MIN_M, AUTO_MAX_M
 # endregion
 
-# region Grayscale Heuristic
-def _looks_like_grayscale(arr: np.ndarray) -> bool:
+# region Shared COG Handle
+_DS = None
+_DS_LOCK = threading.Lock()
+
+
+@contextmanager
+def cog_dataset():
+    """
+    Process-wide rasterio handle on COG_URL, opened on first use and reused
+    across requests. GDAL handles are not thread-safe, so access is serialized.
+    """
+    global _DS
+    with _DS_LOCK, rasterio.Env(**COG_ENV):
+        if _DS is None or _DS.closed:
+            _DS = rasterio.open(COG_URL)
+        yield _DS
+# endregion
+
+# region Preview Window Reader
+@lru_cache(maxsize=PART_CACHE_SIZE)
+def read_part_window(minx, miny, maxx, maxy, H, W, resampling) -> np.ndarray:
+    """
+    Raw band-1 window for a lon/lat bbox resampled to (H, W), NaN outside
+    the raster. Results are cached and returned read-only; copy to modify.
+    """
+    with cog_dataset() as ds:
+        if ds.crs and ds.crs != CRS.from_epsg(4326):
+            xs, ys = warp_transform(
+                CRS.from_epsg(4326), ds.crs, [minx, maxx], [miny, maxy]
+            )
+            minx, maxx = min(xs), max(xs)
+            miny, maxy = min(ys), max(ys)
+
+        win = from_bounds(minx, miny, maxx, maxy, ds.transform)
+        arr = ds.read(
+            1,
+            window=win,
+            out_shape=(H, W),
+            resampling=resampling,
+            boundless=True,
+            fill_value=np.nan,
+            out_dtype="float32",
+        )
+    arr.flags.writeable = False
+    return arr
+# endregion
+
+# region Window Statistics
+@njit(parallel=True, cache=True)
+def _dem_stats_nb(arr):
+    H, W = arr.shape
+    row_n = np.zeros(H, dtype=np.int64)
+    row_sum = np.zeros(H, dtype=np.float64)
+    row_min = np.full(H, np.inf)
+    row_max = np.full(H, -np.inf)
+    for r in prange(H):
+        n = 0
+        tot = 0.0
+        lo = np.inf
+        hi = -np.inf
+        for c in range(W):
+            x = float(arr[r, c])
+            if np.isfinite(x):
+                n += 1
+                tot += x
+                if x < lo:
+                    lo = x
+                if x > hi:
+                    hi = x
+        row_n[r] = n
+        row_sum[r] = tot
+        row_min[r] = lo
+        row_max[r] = hi
+    return row_n.sum(), row_sum.sum(), row_min.min(), row_max.max()
+
+
+def _dem_stats(arr: np.ndarray):
+    """(n_finite, sum, min, max) over the finite cells of a 2-D window."""
+    if HAVE_NUMBA and arr.ndim == 2 and arr.size:
+        n, tot, vmin, vmax = _dem_stats_nb(arr)
+        return int(n), float(tot), float(vmin), float(vmax)
     v = arr[np.isfinite(arr)]
     if v.size == 0:
+        return 0, 0.0, float("inf"), float("-inf")
+    return int(v.size), float(v.sum(dtype=np.float64)), float(v.min()), float(v.max())
+# endregion
+
+# region Grayscale Heuristic
+def _range_looks_like_grayscale(dtype, n_finite: int, vmin: float, vmax: float) -> bool:
+    if n_finite == 0:
         return True
-    vmin, vmax = float(np.min(v)), float(np.max(v))
-    if arr.dtype == np.uint8 and 0.0 <= vmin <= 255.0 and 0.0 <= vmax <= 255.0:
+    if dtype == np.uint8 and 0.0 <= vmin <= 255.0 and 0.0 <= vmax <= 255.0:
         return True
-    if arr.dtype == np.uint16 and 0.0 <= vmin and vmax <= 65535.0:
+    if dtype == np.uint16 and 0.0 <= vmin and vmax <= 65535.0:
         return True
     if (vmax - vmin) < 5.0:
         return True
     if 0.0 <= vmin and vmax < 1000.0:
         return True
     return False
+
+
+def _looks_like_grayscale(arr: np.ndarray) -> bool:
+    n, _, vmin, vmax = _dem_stats(arr)
+    return _range_looks_like_grayscale(arr.dtype, n, vmin, vmax)
 # endregion
 
 # region DEM Window Reader
 def read_dem_window(spec: GridSpec) -> np.ndarray:
-    with rasterio.open(COG_URL) as ds:
+    """Elevation in meters for the grid window, as a float32 (H, W) array."""
+    with cog_dataset() as ds:
         # region Coordinate Transform
         if ds.crs and ds.crs != CRS.from_epsg(4326):
             xs, ys = warp_transform(
@@ -52,6 +147,7 @@ def read_dem_window(spec: GridSpec) -> np.ndarray:
             resampling=Resampling.bilinear,
             boundless=True,
             fill_value=np.nan,
+            out_dtype="float32",
         )
         # endregion
 
@@ -68,13 +164,18 @@ def read_dem_window(spec: GridSpec) -> np.ndarray:
         # endregion
 
     # region Missing Data Fill
-    if np.isnan(arr).any():
-        valid = arr[np.isfinite(arr)]
-        fill = float(np.mean(valid)) if valid.size else 0.0
+    # One stats pass drives both the fill and the grayscale test below; the
+    # fill value is the finite mean, so min/max are unchanged by it.
+    n_finite, total, vmin, vmax = _dem_stats(arr)
+    if n_finite < arr.size:
+        fill = total / n_finite if n_finite else 0.0
         arr = np.where(np.isfinite(arr), arr, fill)
+        if not n_finite:
+            n_finite, vmin, vmax = arr.size, 0.0, 0.0
     # endregion
 
-    v = arr.astype(np.float64)
+    # float32 throughout: +-25 km of Mars relief still resolves to ~2 mm
+    v = arr.astype(np.float32, copy=False)
 
     # region Apply Scale / Offset
     if (band_scale not in (None, 1.0)) or (band_off not in (None, 0.0)):
@@ -84,10 +185,11 @@ def read_dem_window(spec: GridSpec) -> np.ndarray:
     # endregion
 
     # region Grayscale Normalization
-    if _looks_like_grayscale(v):
-        valid = v[np.isfinite(v)]
-        if valid.size:
-            p2, p98 = np.percentile(valid, [2, 98])
+    if _range_looks_like_grayscale(v.dtype, n_finite, vmin, vmax):
+        if n_finite:
+            # every cell is finite after the fill; percentile already runs an
+            # O(n) partition internally, so no separate valid-mask copy
+            p2, p98 = (float(p) for p in np.percentile(v, [2, 98]))
             span = max(p98 - p2, 1e-9)
             return ((v - p2) / span) * (AUTO_MAX_M - AUTO_MIN_M) + AUTO_MIN_M
         return np.zeros_like(v)
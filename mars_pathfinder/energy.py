@@ -2,9 +2,18 @@
 from dataclasses import dataclass
 import math
 from typing import Tuple, Optional
+import numpy as np
 from models import Layers
 # endregion
 
+_SQRT2 = math.sqrt(2.0)
+
+# 8-neighborhood offsets in astar_core.DR/DC order; _DIR_K maps
+# (dr + 1) * 3 + (dc + 1) back to that direction index
+_DR = (-1, -1, -1, 0, 0, 1, 1, 1)
+_DC = (-1, 0, 1, -1, 1, -1, 0, 1)
+_DIR_K = (0, 1, 2, 3, -1, 4, 5, 6, 7)
+
 # region Energy Parameters
 @dataclass
 class EnergyParams:
@@ -21,7 +30,7 @@ class EnergyParams:
 
 # region Helpers
 def _grid_step_m(dr: int, dc: int, meters_per_cell: float) -> float:
-    base = math.sqrt(2.0) if (dr != 0 and dc != 0) else 1.0
+    base = _SQRT2 if (dr != 0 and dc != 0) else 1.0
     return base * meters_per_cell
 # endregion
 
@@ -59,17 +68,60 @@ def move_energy_J(
     return max(0.0, E_batt)
 # endregion
 
+# region Energy Cost Table
+def energy_cost_table(layers: Layers, P: EnergyParams) -> np.ndarray:
+    """
+    move_energy_J for every edge at once: E[r, c, k] is the energy of the
+    step from (r, c) to (r + _DR[k], c + _DC[k]), or +inf when that step
+    leaves the grid or lands on a blocked cell. Shape (H, W, 8), float32.
+    """
+    elev = np.asarray(layers.elevation_m, dtype=np.float64)
+    rough = np.asarray(layers.rough, dtype=np.float64)
+    blocked = np.asarray(layers.blocked, dtype=bool)
+    H, W = elev.shape
+    m_g = P.mass_kg * P.g
+    inv_eta = 1.0 / max(1e-6, min(1.0, P.eta))
+
+    E = np.full((H, W, 8), np.inf, dtype=np.float32)
+    for k in range(8):
+        dr, dc = _DR[k], _DC[k]
+        d_m = _grid_step_m(dr, dc, P.meters_per_cell)
+        # source window and the matching destination window
+        rs = slice(max(-dr, 0), H - max(dr, 0))
+        cs = slice(max(-dc, 0), W - max(dc, 0))
+        rd = slice(max(dr, 0), H + min(dr, 0))
+        cd = slice(max(dc, 0), W + min(dc, 0))
+
+        dh = elev[rd, cd] - elev[rs, cs]
+        grade = dh / d_m if d_m > 0 else np.zeros_like(dh)
+        np.clip(grade, P.min_grade, P.max_grade, out=grade)
+        theta = np.arctan(grade)
+        sin_t = np.sin(theta)
+
+        E_mech_no_regen = (m_g * np.maximum(0.0, sin_t) + P.Crr * m_g * np.abs(np.cos(theta))) * d_m
+        E_regen = P.downhill_regen_eff * m_g * np.maximum(0.0, -sin_t) * d_m
+        E_rough = P.k_rough_J_per_m * rough[rd, cd] * d_m
+        E_batt = np.maximum(0.0, E_mech_no_regen * inv_eta + E_rough - E_regen)
+        E[rs, cs, k] = np.where(blocked[rd, cd], np.inf, E_batt)
+    return E
+# endregion
+
 # region Factory
 def physical_energy_cost_fn(
     layers: Layers,
     params: EnergyParams,
     scale_cost: float = 1.0,
 ):
+    # Resolve every edge up front; the closure is a single table read.
+    E = energy_cost_table(layers, params)
+    if scale_cost != 1.0:
+        E *= np.float32(scale_cost)
+    inf = float("inf")
+
     def cost(u, v):
-        E = move_energy_J(u, v, layers, params)
-        if E is None:
-            return None
-        return float(E * scale_cost)
+        (r0, c0), (r1, c1) = u, v
+        e = float(E[r0, c0, _DIR_K[(r1 - r0 + 1) * 3 + (c1 - c0 + 1)]])
+        return None if e == inf else e
 
     return cost
 # endregion
\ No newline at end of file
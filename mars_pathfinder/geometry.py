@@ -1,5 +1,6 @@
 # region Imports
 import math
+import numpy as np
 from config import MARS_R
 # endregion
 
@@ -9,6 +10,38 @@ def horiz_dist_m(lon1, lat1, lon2, lat2) -> float:
     x = (lon2 - lon1) * to_rad * math.cos((lat1 + lat2) * 0.5 * to_rad) * MARS_R
     y = (lat2 - lat1) * to_rad * MARS_R
     return math.hypot(x, y)
+
+
+def horiz_dist_m_grid(lon, lat, glon: float, glat: float) -> np.ndarray:
+    """Vectorized horiz_dist_m from every (lon, lat) to one goal point."""
+    to_rad = math.pi / 180.0
+    x = (glon - lon) * to_rad * np.cos((lat + glat) * 0.5 * to_rad) * MARS_R
+    y = (glat - lat) * to_rad * MARS_R
+    return np.sqrt(x * x + y * y).astype(np.float32)
+
+
+def edge_length_table(lon_axis, lat_axis) -> np.ndarray:
+    """
+    horiz_dist_m for every 8-neighbor step on a regular lon/lat grid:
+    T[r, dr + 1, dc + 1] is the length of (r, c) -> (r + dr, c + dc), which
+    depends only on the row because cos(lat) does. Shape (H, 3, 3).
+    """
+    xs = np.asarray(lon_axis, dtype=np.float64)
+    ys = np.asarray(lat_axis, dtype=np.float64)
+    H = ys.size
+    to_rad = math.pi / 180.0
+    dlon = float(xs[1] - xs[0]) if xs.size > 1 else 0.0
+    dlat = float(ys[1] - ys[0]) if H > 1 else 0.0
+
+    T = np.zeros((H, 3, 3), dtype=np.float64)
+    for dr in (-1, 0, 1):
+        lat_mid = ys + 0.5 * dr * dlat
+        x_unit = dlon * to_rad * np.cos(lat_mid * to_rad) * MARS_R
+        y = dr * dlat * to_rad * MARS_R
+        for dc in (-1, 0, 1):
+            x = dc * x_unit
+            T[:, dr + 1, dc + 1] = np.sqrt(x * x + y * y)
+    return T
 # endregion
 
 # region Degree‑to‑Kilometer Conversions
@@ -4,10 +4,20 @@ from models import GridSpec
 # endregion
 
 # region Grid Coordinate Generation
+def lonlat_axes(spec: GridSpec):
+    """Column longitudes (W,) and row latitudes (H,) of the grid."""
+    xs = np.linspace(spec.min_lon, spec.max_lon, spec.W)
+    ys = np.linspace(spec.min_lat, spec.max_lat, spec.H)
+    return xs, ys
+
+
 def lonlat_grid(spec: GridSpec):
-    xs = np.linspace(spec.min_lon, spec.max_lon, spec.W, dtype=np.float64)
-    ys = np.linspace(spec.min_lat, spec.max_lat, spec.H, dtype=np.float64)
-    return np.tile(xs, spec.H), np.repeat(ys, spec.W)
+    """
+    Broadcastable (1, W) longitude and (H, 1) latitude views of the grid;
+    combine them with normal broadcasting rather than materializing H*W.
+    """
+    xs, ys = lonlat_axes(spec)
+    return np.meshgrid(xs, ys, sparse=True, copy=False)
 # endregion
 
 # region Index Helpers
@@ -37,8 +47,7 @@ def idx_to_rc(i: int, W: int):
 
 # region Conversion Factory
 def rc_to_lonlat_factory(spec: GridSpec):
-    xs = np.linspace(spec.min_lon, spec.max_lon, spec.W)
-    ys = np.linspace(spec.min_lat, spec.max_lat, spec.H)
+    xs, ys = lonlat_axes(spec)
 
     def f(r: int, c: int):
         return float(xs[c]), float(ys[r])
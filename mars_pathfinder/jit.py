@@ -0,0 +1,22 @@
+# region Imports
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except Exception:
+    HAVE_NUMBA = False
+# endregion
+
+# region Pure-Python Fallback
+if not HAVE_NUMBA:
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit: kernels run as plain Python."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def wrap(fn):
+            return fn
+
+        return wrap
+
+    prange = range
+# endregion
@@ -3,6 +3,60 @@ import numpy as np
 import math
 from models import GridSpec
 from config import MARS_R
+from jit import HAVE_NUMBA, njit, prange
+# endregion
+
+# region Fused Kernels
+# Tile edge (cells); a 256x256 block of elevation plus its halo stays in L2
+# while the stencil runs, instead of streaming the DEM once per output.
+TILE = 256
+
+
+@njit(parallel=True, cache=True)
+def _grad_mag_tiled(elev, dy, dx, out):
+    # |grad| with np.gradient semantics (central inside, one-sided at the
+    # edges); gx/gy live in registers, only the magnitude is written
+    H, W = elev.shape
+    inv_dy = 1.0 / dy
+    inv_dx = 1.0 / dx
+    n_tiles = (H + TILE - 1) // TILE
+    for t in prange(n_tiles):
+        r0 = t * TILE
+        r1 = min(H, r0 + TILE)
+        for c0 in range(0, W, TILE):
+            c1 = min(W, c0 + TILE)
+            for r in range(r0, r1):
+                if r == 0:
+                    ra, rb, fy = 0, 1, inv_dy
+                elif r == H - 1:
+                    ra, rb, fy = H - 2, H - 1, inv_dy
+                else:
+                    ra, rb, fy = r - 1, r + 1, 0.5 * inv_dy
+                for c in range(c0, c1):
+                    if c == 0:
+                        ca, cb, fx = 0, 1, inv_dx
+                    elif c == W - 1:
+                        ca, cb, fx = W - 2, W - 1, inv_dx
+                    else:
+                        ca, cb, fx = c - 1, c + 1, 0.5 * inv_dx
+                    gy = (float(elev[rb, c]) - float(elev[ra, c])) * fy
+                    gx = (float(elev[r, cb]) - float(elev[r, ca])) * fx
+                    out[r, c] = math.sqrt(gx * gx + gy * gy)
+
+
+@njit(parallel=True, cache=True)
+def _norm_rough(mag, lo, span, out):
+    # (m - lo) / span clipped to [0, 1]; NaN passes through like np.clip
+    H, W = mag.shape
+    inv = 1.0 / span
+    for r in prange(H):
+        for c in range(W):
+            x = (mag[r, c] - lo) * inv
+            if x < 0.0:
+                x = 0.0
+            elif x > 1.0:
+                x = 1.0
+            out[r, c] = x
 # endregion
 
 # region Cell Metric Computation
@@ -19,8 +73,12 @@ def compute_cell_metrics(elev_m: np.ndarray, spec: GridSpec):
     # endregion
 
     # region Gradients and Roughness
-    gy, gx = np.gradient(elev_m, dy_m, dx_m)
-    grad_mag = np.hypot(gx, gy)
+    if HAVE_NUMBA and H > 1 and W > 1:
+        grad_mag = np.empty((H, W), dtype=np.float32)
+        _grad_mag_tiled(elev_m, dy_m, dx_m, grad_mag)
+    else:
+        gy, gx = np.gradient(elev_m, dy_m, dx_m)
+        grad_mag = np.sqrt(gx * gx + gy * gy)
 
     valid = grad_mag[np.isfinite(grad_mag)]
     if valid.size == 0:
@@ -28,8 +86,12 @@ def compute_cell_metrics(elev_m: np.ndarray, spec: GridSpec):
     else:
         lo, hi = np.percentile(valid, [5, 95])
         span = max(hi - lo, 1e-6)
-        rough = np.clip((grad_mag - lo) / span, 0, 1).astype(np.float32)
+        if HAVE_NUMBA:
+            rough = np.empty(grad_mag.shape, dtype=np.float32)
+            _norm_rough(grad_mag, float(lo), float(span), rough)
+        else:
+            rough = np.clip((grad_mag - lo) / span, 0, 1).astype(np.float32)
     # endregion
 
-    return rough.astype(np.float32), grad_mag.astype(np.float32)
+    return rough.astype(np.float32, copy=False), grad_mag.astype(np.float32, copy=False)
 # endregion
\ No newline at end of file
@@ -17,7 +17,7 @@ class GridSpec:
 # region Layer Data
 @dataclass
 class Layers:
-    elevation_m: np.ndarray   # (H, W)
+    elevation_m: np.ndarray   # (H, W) float32 meters
     rough: np.ndarray         # (H, W) normalized [0,1]
     blocked: np.ndarray       # (H, W) boolean mask
 # endregion
\ No newline at end of file
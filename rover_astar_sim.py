@@ -2,7 +2,11 @@
 import heapq
 import math
 import time
+from collections import deque
+from functools import partial
 from typing import Callable, Tuple, List, Optional, Any
+import numpy as np
+from jit import njit
 # endregion
 
 # region Helper Functions
@@ -23,6 +27,39 @@ def euclid(a, b):
     return math.hypot(ar - br, ac - bc)
 
 
+_OCTILE_K = math.sqrt(2.0) - 1.0
+
+
+def octile(a, b):
+    # exact 8-connected distance with unit/sqrt(2) steps; no sqrt per call
+    dr = abs(a[0] - b[0])
+    dc = abs(a[1] - b[1])
+    if dr < dc:
+        return dc + _OCTILE_K * dr
+    return dr + _OCTILE_K * dc
+
+
+def manhattan(a, b):
+    # exact 4-connected distance with unit steps
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def octile_table(goal, shape):
+    """octile(v, goal) for every cell of an (H, W) grid, as a float64 array."""
+    H, W = shape
+    dr = np.abs(np.arange(H, dtype=np.float64) - goal[0])[:, None]
+    dc = np.abs(np.arange(W, dtype=np.float64) - goal[1])[None, :]
+    return np.maximum(dr, dc) + _OCTILE_K * np.minimum(dr, dc)
+
+
+def manhattan_table(goal, shape):
+    """manhattan(v, goal) for every cell of an (H, W) grid, as a float64 array."""
+    H, W = shape
+    dr = np.abs(np.arange(H, dtype=np.float64) - goal[0])[:, None]
+    dc = np.abs(np.arange(W, dtype=np.float64) - goal[1])[None, :]
+    return dr + dc
+
+
 def reconstruct(parent, goal):
     path = []
     v = goal
@@ -31,9 +68,87 @@ def reconstruct(parent, goal):
         v = parent.get(v)
     path.reverse()
     return path
+
+
+def reconstruct_idx(parent, goal_idx, W, offset=0):
+    """
+    Walk a flat predecessor list (-1 terminated) back from goal_idx. Ids are
+    relative to flat id `offset` (see astar's bounds).
+    """
+    path = []
+    v = goal_idx
+    while v >= 0:
+        path.append(((v + offset) // W, (v + offset) % W))
+        v = parent[v]
+    path.reverse()
+    return path
+
+
+def ids_to_rc(ids, W, r0=0, c0=0):
+    """
+    (N, 2) int32 array of (r, c) rows for flat ids on a width-W grid whose
+    cell (0, 0) is (r0, c0). The compiled searches return expanded_order in
+    this layout; viz.show_search_heatmap takes it without conversion.
+    """
+    ids = np.asarray(ids)
+    rc = np.empty((ids.size, 2), dtype=np.int32)
+    rc[:, 0] = ids // W + r0
+    rc[:, 1] = ids % W + c0
+    return rc
+# endregion
+
+# region Bucket Queue
+class BucketQueue:
+    """
+    Dial-style approximate priority queue: entries land in bucket
+    floor(key / width) and pop FIFO from the lowest non-empty bucket, so
+    push and pop are O(1) amortized. Keys within one bucket are not ordered,
+    which can cost up to `width` of optimality per pop.
+    """
+
+    def __init__(self, width: float):
+        if not width > 0:
+            raise ValueError("bucket width must be positive")
+        self.inv_width = 1.0 / width
+        self.buckets = {}
+        self.cursor = 0
+        self.top = -1
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def push(self, entry):
+        i = int(entry[0] * self.inv_width)
+        b = self.buckets.get(i)
+        if b is None:
+            b = self.buckets[i] = deque()
+        b.append(entry)
+        if i < self.cursor:
+            self.cursor = i
+        if i > self.top:
+            self.top = i
+        self.n += 1
+
+    def pop(self):
+        while True:
+            b = self.buckets.get(self.cursor)
+            if b:
+                self.n -= 1
+                entry = b.popleft()
+                if not b:
+                    del self.buckets[self.cursor]
+                return entry
+            if self.cursor >= self.top:
+                raise IndexError("pop from empty BucketQueue")
+            self.cursor += 1
 # endregion
 
 # region A* Algorithm
+# The beam frontier may grow to BEAM_SLACK * beam_width before it is cut back.
+BEAM_SLACK = 4
+
+
 def astar(
     start: Tuple[int, int],
     goal: Tuple[int, int],
@@ -41,33 +156,88 @@ def astar(
     edge_cost_fn: Callable[[Tuple[int, int], Tuple[int, int]], Optional[float]],
     heuristic_fn: Callable[[Tuple[int, int], Tuple[int, int]], float],
     *,
+    shape: Tuple[int, int],
     weight: float = 1.0,
     epsilon: Optional[float] = None,
     max_expansions: Optional[int] = None,
     max_time_sec: Optional[float] = None,
     beam_width: Optional[int] = None,
+    bucket_width: Optional[float] = None,
+    h_table: Optional[np.ndarray] = None,
+    flat_ids: bool = False,
+    bounds: Optional[Tuple[int, int, int, int]] = None,
 ):
     """
+    shape is the (H, W) grid; g/parent/closed live in flat per-cell storage
+    indexed by r * W + c. With bounds = (rmin, rmax, cmin, cmax) that storage
+    only covers rows rmin..rmax (ids shifted by rmin * W), so neighbors_fn
+    must not leave those rows.
+
+    With flat_ids=True the callbacks work on those ids instead of (r, c)
+    tuples: neighbors_fn(ui) yields ids, edge_cost_fn(ui, vi) and
+    heuristic_fn(vi, goal_id). start/goal and the returned path and
+    expanded_order stay (r, c).
+
+    h_table, if given, is an (H, W) array of heuristic values toward goal
+    (e.g. octile_table(goal, shape)); it replaces the per-relaxation
+    heuristic_fn call with a lookup.
+
+    bucket_width switches the open list from a binary heap to a BucketQueue
+    of that width (approximate ordering; pick about the median edge cost,
+    or eps * h_min when weight > 1). It can't be combined with beam_width.
+
     Returns:
       path, total_cost, expansions, expanded_order(list), frontier_snaps(None placeholder)
+    (the compiled searches return expanded_order as an ids_to_rc array)
     """
     if start == goal:
         return [start], 0.0, 0, [start], None
+    if bucket_width is not None and beam_width is not None:
+        raise ValueError("beam_width and bucket_width are mutually exclusive")
 
     t0 = time.time()
     counter = 0  # stable tie-breaker
 
-    # open heap: (f, h, counter, node)
-    openh: List[Tuple[float, float, int, Tuple[int, int]]] = []
-    h0 = heuristic_fn(start, goal)
-    heapq.heappush(openh, (h0 * weight, h0, counter, start))
+    H, W = shape
+    # row band the search state covers; ids below are local (global - off)
+    r_lo, r_hi = (0, H - 1) if bounds is None else (bounds[0], bounds[1])
+    off = r_lo * W
+    N = (r_hi - r_lo + 1) * W
+    h_flat = None
+    if h_table is not None:
+        h_flat = np.asarray(h_table, dtype=np.float64).ravel()[off:off + N].tolist()
+    start_i = start[0] * W + start[1] - off
+    if flat_ids:
+        # nodes are ints from here on; only the outputs are decoded
+        start, goal = start_i + off, goal[0] * W + goal[1]
 
-    g = {start: 0.0}
-    parent = {start: None}
-    closed = set()
+    # open list entries: (f, h, counter, node)
+    h0 = heuristic_fn(start, goal) if h_flat is None else h_flat[start_i]
+    if bucket_width is not None:
+        openh = BucketQueue(bucket_width)
+        push, pop = openh.push, openh.pop
+    else:
+        openh: List[Tuple[float, float, int, Tuple[int, int]]] = []
+        push = partial(heapq.heappush, openh)
+        pop = partial(heapq.heappop, openh)
+    push((h0 * weight, h0, counter, start))
+
+    # Lists/bytearray rather than NumPy: from interpreted code they index
+    # without boxing a scalar per access.
+    inf = float("inf")
+    g = [inf] * N
+    parent = [-1] * N
+    closed = bytearray(N)
+    g[start_i] = 0.0
     expansions = 0
     expanded_order = []
 
+    def order_rc():
+        return [divmod(i, W) for i in expanded_order] if flat_ids else expanded_order
+
+    def path_to(vi):
+        return reconstruct_idx(parent, vi, W, off)
+
     best_goal_cost = None
     best_goal_node = None
 
@@ -76,73 +246,344 @@ def astar(
         if max_time_sec is not None and (time.time() - t0) > max_time_sec:
             if best_goal_node is not None:
                 return (
-                    reconstruct(parent, best_goal_node),
+                    path_to(best_goal_node),
                     best_goal_cost,
                     expansions,
-                    expanded_order,
+                    order_rc(),
                     None,
                 )
-            return None, float("inf"), expansions, expanded_order, None
+            return None, float("inf"), expansions, order_rc(), None
         # endregion
 
-        f, h, _, u = heapq.heappop(openh)
+        f, h, _, u = pop()
 
         # region Early Stopping with (1+epsilon)
         if epsilon is not None and best_goal_cost is not None:
             min_f = f
             if best_goal_cost <= (1.0 + epsilon) * min_f:
-                return reconstruct(parent, best_goal_node), best_goal_cost, expansions, expanded_order, None
+                return path_to(best_goal_node), best_goal_cost, expansions, order_rc(), None
         # endregion
 
-        if u in closed:
+        ui = (u if flat_ids else u[0] * W + u[1]) - off
+        if closed[ui]:
             continue
-        closed.add(u)
+        closed[ui] = 1
         expanded_order.append(u)
         expansions += 1
 
         # region Expansion Cap
         if max_expansions is not None and expansions >= max_expansions:
             if best_goal_node is not None:
-                return reconstruct(parent, best_goal_node), best_goal_cost, expansions, expanded_order, None
-            return None, float("inf"), expansions, expanded_order, None
+                return path_to(best_goal_node), best_goal_cost, expansions, order_rc(), None
+            return None, float("inf"), expansions, order_rc(), None
         # endregion
 
         if u == goal:
-            return reconstruct(parent, u), g[u], expansions, expanded_order, None
+            return path_to(ui), g[ui], expansions, order_rc(), None
 
-        gu = g[u]
+        gu = g[ui]
         # region Neighbor Expansion
         for v in neighbors_fn(u):
             c = edge_cost_fn(u, v)
             if c is None:
                 continue
             alt = gu + c
-            if v in closed:
+            vi = (v if flat_ids else v[0] * W + v[1]) - off
+            if closed[vi]:
                 continue
-            old = g.get(v)
-            if old is None or alt < old - 1e-12:
-                g[v] = alt
-                parent[v] = u
-                hv = heuristic_fn(v, goal)
+            if alt < g[vi] - 1e-12:
+                g[vi] = alt
+                parent[vi] = ui
+                hv = heuristic_fn(v, goal) if h_flat is None else h_flat[vi]
                 counter += 1
-                heapq.heappush(openh, (alt + weight * hv, hv, counter, v))
+                push((alt + weight * hv, hv, counter, v))
 
                 # track best goal found
                 if v == goal:
                     if best_goal_cost is None or alt < best_goal_cost - 1e-12:
                         best_goal_cost = alt
-                        best_goal_node = v
+                        best_goal_node = vi
         # endregion
 
         # region Beam Pruning
-        if beam_width is not None and len(openh) > beam_width:
-            openh = heapq.nsmallest(beam_width, openh)
+        # Cutting only after BEAM_SLACK * beam_width entries amortizes the
+        # O(N) partition over many pushes instead of paying it every expansion.
+        if beam_width is not None and len(openh) > BEAM_SLACK * beam_width:
+            keys = np.fromiter((e[0] for e in openh), dtype=np.float64, count=len(openh))
+            keep = np.argpartition(keys, beam_width - 1)[:beam_width]
+            openh[:] = [openh[i] for i in keep.tolist()]
             heapq.heapify(openh)
         # endregion
 
     # region Fallback
     if best_goal_node is not None:
-        return reconstruct(parent, best_goal_node), best_goal_cost, expansions, expanded_order, None
-    return None, float("inf"), expansions, expanded_order, None
+        return path_to(best_goal_node), best_goal_cost, expansions, order_rc(), None
+    return None, float("inf"), expansions, order_rc(), None
     # endregion
-# endregion
\ No newline at end of file
+# endregion
+
+# region Bidirectional A*
+def bidirectional_astar(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    neighbors_fn: Callable[[Tuple[int, int]], Any],
+    edge_cost_fn: Callable[[Tuple[int, int], Tuple[int, int]], Optional[float]],
+    heuristic_fn: Callable[[Tuple[int, int], Tuple[int, int]], float],
+):
+    """
+    Exact bidirectional A* (the NBA* scheme): a forward search from start
+    and a backward search from goal share one settled set, and a popped node
+    is only expanded if neither side's bound proves it can't improve the
+    best meeting cost. The backward search walks edges in reverse (cost of
+    p -> u is still edge_cost_fn(p, u)), so neighbors_fn must be symmetric
+    and heuristic_fn consistent toward both the goal and the start.
+    Returns the same tuple as astar().
+    """
+    if start == goal:
+        return [start], 0.0, 0, [start], None
+
+    # index 0: forward from start, 1: backward from goal
+    targets = (goal, start)
+    g = ({start: 0.0}, {goal: 0.0})
+    parent = ({start: None}, {goal: None})
+    f0 = (heuristic_fn(start, goal), heuristic_fn(goal, start))
+    openh = ([(f0[0], 0, start)], [(f0[1], 0, goal)])
+    F = list(f0)  # lower bound on each side's open f
+    settled = set()
+    counter = 0
+    expansions = 0
+    expanded_order = []
+    best = float("inf")
+    meet = None
+
+    while openh[0] and openh[1]:
+        # grow the smaller frontier
+        side = 0 if len(openh[0]) <= len(openh[1]) else 1
+        other = 1 - side
+        _, _, u = heapq.heappop(openh[side])
+        if u not in settled:
+            settled.add(u)
+            gs, go = g[side], g[other]
+            gu = gs[u]
+            if (
+                gu + heuristic_fn(u, targets[side]) < best
+                and gu + F[other] - heuristic_fn(u, targets[other]) < best
+            ):
+                expanded_order.append(u)
+                expansions += 1
+                for v in neighbors_fn(u):
+                    if v in settled:
+                        continue
+                    c = edge_cost_fn(u, v) if side == 0 else edge_cost_fn(v, u)
+                    if c is None:
+                        continue
+                    alt = gu + c
+                    old = gs.get(v)
+                    if old is None or alt < old - 1e-12:
+                        gs[v] = alt
+                        parent[side][v] = u
+                        counter += 1
+                        heapq.heappush(openh[side], (alt + heuristic_fn(v, targets[side]), counter, v))
+                        gv = go.get(v)
+                        if gv is not None and alt + gv < best:
+                            best = alt + gv
+                            meet = v
+        if openh[side]:
+            F[side] = openh[side][0][0]
+
+    if meet is None:
+        return None, float("inf"), expansions, expanded_order, None
+    fwd = reconstruct(parent[0], meet)
+    bwd = reconstruct(parent[1], meet)
+    bwd.reverse()
+    return fwd + bwd[1:], best, expansions, expanded_order, None
+# endregion
+
+# region Compiled Energy A*
+@njit(cache=True)
+def _reconstruct_nb(parent, goal_idx, W):
+    # two walks up the predecessor chain: count, then fill back to front so
+    # the (n, 2) rows come out start-first without a reverse
+    n = 0
+    v = goal_idx
+    while v >= 0:
+        n += 1
+        v = parent[v]
+    rc = np.empty((n, 2), dtype=np.int32)
+    v = goal_idx
+    for i in range(n - 1, -1, -1):
+        rc[i, 0] = v // W
+        rc[i, 1] = v % W
+        v = parent[v]
+    return rc
+
+
+# Binary heap as parallel arrays (hf key, hc insertion counter, hn node)
+# with hand-written sifts, shared by every compiled search. float64 keys
+# keep pop order exact; dropping the counter or narrowing keys to float32
+# measured within noise, so ties stay FIFO.
+@njit(cache=True)
+def _heap_less(fa, ca, fb, cb):
+    return fa < fb or (fa == fb and ca < cb)
+
+
+@njit(cache=True)
+def _heap_push(hf, hc, hn, n, f, ctr, node):
+    i = n
+    while i > 0:
+        p = (i - 1) >> 1
+        if not _heap_less(f, ctr, hf[p], hc[p]):
+            break
+        hf[i] = hf[p]
+        hc[i] = hc[p]
+        hn[i] = hn[p]
+        i = p
+    hf[i] = f
+    hc[i] = ctr
+    hn[i] = node
+    return n + 1
+
+
+@njit(cache=True)
+def _heap_pop(hf, hc, hn, n):
+    node = hn[0]
+    n -= 1
+    lf = hf[n]
+    lc = hc[n]
+    ln = hn[n]
+    i = 0
+    while True:
+        c = 2 * i + 1
+        if c >= n:
+            break
+        if c + 1 < n and _heap_less(hf[c + 1], hc[c + 1], hf[c], hc[c]):
+            c += 1
+        if not _heap_less(hf[c], hc[c], lf, lc):
+            break
+        hf[i] = hf[c]
+        hc[i] = hc[c]
+        hn[i] = hn[c]
+        i = c
+    if n > 0:
+        hf[i] = lf
+        hc[i] = lc
+        hn[i] = ln
+    return node, n
+
+
+@njit(cache=True)
+def _astar_njit(start_id, goal_id, H, W, E, blocked, h_per_cell, diag, weight, max_expansions):
+    N = H * W
+    g = np.full(N, np.inf, dtype=np.float64)
+    parent = np.full(N, -1, dtype=np.int32)
+    closed = np.zeros(N, dtype=np.uint8)
+    order = np.empty(N, dtype=np.int32)
+    cap = 8 * N + 1
+    hf = np.empty(cap, dtype=np.float64)
+    hc = np.empty(cap, dtype=np.int64)
+    hn = np.empty(cap, dtype=np.int32)
+
+    gr = goal_id // W
+    gc = goal_id % W
+    g[start_id] = 0.0
+    n = _heap_push(hf, hc, hn, 0, 0.0, 0, start_id)
+    counter = 0
+    expansions = 0
+
+    while n > 0:
+        u, n = _heap_pop(hf, hc, hn, n)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        order[expansions] = u
+        expansions += 1
+        if u == goal_id:
+            break
+        if max_expansions > 0 and expansions >= max_expansions:
+            break
+
+        ur = u // W
+        uc = u % W
+        gu = g[u]
+        for dr in (-1, 0, 1):
+            vr = ur + dr
+            if vr < 0 or vr >= H:
+                continue
+            for dc in (-1, 0, 1):
+                if dr == 0 and dc == 0:
+                    continue
+                vc = uc + dc
+                if vc < 0 or vc >= W or blocked[vr, vc]:
+                    continue
+                v = vr * W + vc
+                if closed[v]:
+                    continue
+                alt = gu + E[dr + 1, dc + 1, vr, vc]
+                if alt < g[v]:
+                    g[v] = alt
+                    parent[v] = u
+                    ar = abs(vr - gr)
+                    ac = abs(vc - gc)
+                    h = (max(ar, ac) + (diag - 1.0) * min(ar, ac)) * h_per_cell
+                    counter += 1
+                    n = _heap_push(hf, hc, hn, n, alt + weight * h, counter, v)
+
+    return g[goal_id], parent, order[:expansions], expansions
+
+
+def _min_energy_per_m(E, blocked, meters_per_cell) -> float:
+    """
+    Cheapest energy per meter over every edge into a free cell, read off
+    the (3, 3, H, W) energy table; scaling octile distance by it gives an
+    admissible heuristic.
+    """
+    free = ~blocked
+    if not free.any():
+        return 0.0
+    best = float("inf")
+    for dr in (-1, 0, 1):
+        for dc in (-1, 0, 1):
+            if dr == 0 and dc == 0:
+                continue
+            d_m = meters_per_cell * (math.sqrt(2.0) if (dr and dc) else 1.0)
+            best = min(best, float(E[dr + 1, dc + 1][free].min()) / d_m)
+    return best if math.isfinite(best) else 0.0
+
+
+def astar_energy(
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    layers,
+    params,
+    *,
+    weight: float = 1.0,
+    max_expansions: Optional[int] = None,
+):
+    """
+    Minimum-energy 8-connected A* over CostLayers using the energy_model
+    physics, compiled end to end (no Python callbacks per edge).
+    Returns the same tuple as astar().
+    """
+    from energy_model import energy_planes
+
+    if start == goal:
+        return [start], 0.0, 0, np.array([start], dtype=np.int32), None
+
+    H, W = layers.blocked.shape
+    E = energy_planes(layers, params)
+    blocked = np.ascontiguousarray(layers.blocked, dtype=np.bool_)
+    mpc = params.meters_per_cell
+    h_per_cell = _min_energy_per_m(E, blocked, mpc) * mpc
+
+    cost, parent, order, expansions = _astar_njit(
+        start[0] * W + start[1], goal[0] * W + goal[1], H, W,
+        E, blocked, h_per_cell, math.sqrt(2.0), float(weight),
+        int(max_expansions or 0),
+    )
+    expanded_order = ids_to_rc(order, W)
+    if not np.isfinite(cost):
+        return None, float("inf"), int(expansions), expanded_order, None
+
+    path = list(map(tuple, _reconstruct_nb(parent, goal[0] * W + goal[1], W).tolist()))
+    return path, float(cost), int(expansions), expanded_order, None
+# endregion
@@ -13,12 +13,21 @@ Optional (for 3D):
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import numpy as np
+import collections
+import copy
 import json
+import os
+import time
+from functools import lru_cache
 import matplotlib.pyplot as plt
 from matplotlib.widgets import RectangleSelector
 from matplotlib.backend_bases import MouseButton
 
-from rover_astar_sim import astar
+from rover_astar_sim import astar, manhattan, manhattan_table, octile, octile_table
+from astar_numba import astar_bidir_numba, astar_numba
+from jps import jps
+from hpa import HPAGraph
+from jit import HAVE_NUMBA
 from cost_layers import make_mars_from_geotiff_window, WeightedCost
 from viz import show_search_heatmap
 try:
@@ -29,27 +38,72 @@ except Exception:
 # endregion
 
 # region Heuristics & Neighbors
-def heuristic_fn(a, b):
-    return np.hypot(a[0] - b[0], a[1] - b[1])
+heuristic_fn = octile
 
-def weighted_heuristic_fn(eps=1.2):
+def weighted_heuristic_fn(eps=1.2, four_connected=False):
+    # octile is exact for 8-connected moves, Manhattan for 4-connected
+    dist = manhattan if four_connected else octile
+    if eps == 1.0:
+        return dist
     def h(a, b):
-        return eps * np.hypot(a[0] - b[0], a[1] - b[1])
+        return eps * dist(a, b)
     return h
 
-def neighbors_fn_roi(H, W, bounds, four_connected=False):
+# (dr, dc) neighbour offsets, axial first; shared with the compiled search
+STEPS4 = np.array([(-1,0),(1,0),(0,-1),(0,1)], dtype=np.int32)
+STEPS8 = np.concatenate([STEPS4, np.array([(-1,-1),(-1,1),(1,-1),(1,1)], dtype=np.int32)])
+
+# Legs shorter than this (Chebyshev cells) stay unidirectional: the second
+# heap costs more than the bidirectional search saves on small searches.
+BIDIR_MIN_CELLS = 64
+
+def neighbors_fn_roi(H, W, bounds, four_connected=False, flat=False):
+    """Neighbours inside the ROI; flat=True takes and yields ids r*W+c."""
     rmin, rmax, cmin, cmax = bounds
-    steps4 = [(-1,0),(1,0),(0,-1),(0,1)]
-    steps8 = steps4 + [(-1,-1),(-1,1),(1,-1),(1,1)]
-    steps = steps4 if four_connected else steps8
-    def fn(u):
-        r, c = u
-        nbrs = []
-        for dr, dc in steps:
-            rr, cc = r + dr, c + dc
-            if rmin <= rr <= rmax and cmin <= cc <= cmax:
-                nbrs.append((rr, cc))
-        return nbrs
+    # plain int tuples for the per-call loop; NumPy ops per call cost more
+    # than the 8 additions they would replace
+    steps = tuple(map(tuple, (STEPS4 if four_connected else STEPS8).tolist()))
+    # cells at least one step inside the ROI need no bounds checks
+    r_lo, r_hi, c_lo, c_hi = rmin + 1, rmax - 1, cmin + 1, cmax - 1
+
+    def edge(r, c):
+        return tuple((r + dr, c + dc) for dr, dc in steps
+                     if rmin <= r + dr <= rmax and cmin <= c + dc <= cmax)
+
+    if four_connected:
+        def fn(u):
+            r, c = u
+            if r_lo <= r <= r_hi and c_lo <= c <= c_hi:
+                return ((r-1, c), (r+1, c), (r, c-1), (r, c+1))
+            return edge(r, c)
+    else:
+        def fn(u):
+            r, c = u
+            if r_lo <= r <= r_hi and c_lo <= c <= c_hi:
+                rm, rp, cm, cp = r - 1, r + 1, c - 1, c + 1
+                return ((rm, c), (rp, c), (r, cm), (r, cp),
+                        (rm, cm), (rm, cp), (rp, cm), (rp, cp))
+            return edge(r, c)
+
+    if flat:
+        # same neighbour order as the tuple closures, as ids
+        def edge_ids(r, c):
+            return tuple(rr * W + cc for rr, cc in edge(r, c))
+
+        if four_connected:
+            def fn(u):
+                r, c = divmod(u, W)
+                if r_lo <= r <= r_hi and c_lo <= c <= c_hi:
+                    return (u - W, u + W, u - 1, u + 1)
+                return edge_ids(r, c)
+        else:
+            def fn(u):
+                r, c = divmod(u, W)
+                if r_lo <= r <= r_hi and c_lo <= c <= c_hi:
+                    up, dn = u - W, u + W
+                    return (up, dn, u - 1, u + 1,
+                            up - 1, up + 1, dn - 1, dn + 1)
+                return edge_ids(r, c)
     return fn
 
 def roi_bounds(points, H, W, pad=200):
@@ -65,7 +119,7 @@ def save_path_geojson_like(path_ll, outfile="route_lonlat.json"):
         json.dump({"positions": path_ll}, f, indent=2)
     return outfile
 
-def path_rc_to_lonlat_geotiff_resampled(
+def path_rc_to_lonlat_arrays(
     path,
     *,
     transform,
@@ -75,8 +129,10 @@ def path_rc_to_lonlat_geotiff_resampled(
     H_resampled,
     W_resampled
 ):
-    """Convert (row,col) from resampled crop to lon/lat using window transform."""
-    from rasterio.transform import xy
+    """
+    Convert (row,col) from resampled crop to lon/lat using window transform.
+    Returns (lon, lat) float64 arrays, lon wrapped to [-180, 180).
+    """
     try:
         from rasterio.crs import CRS
         from pyproj import Transformer
@@ -90,19 +146,93 @@ def path_rc_to_lonlat_geotiff_resampled(
     if crs and not getattr(crs, "is_geographic", False) and Transformer is not None:
         to_wgs84 = Transformer.from_crs(crs, CRS.from_epsg(4326), always_xy=True)
 
-    out = []
-    for r_res, c_res in path:
-        r_nat = (r_res + 0.5) * sy - 0.5
-        c_nat = (c_res + 0.5) * sx - 0.5
-        x_native, y_native = xy(transform, r_nat, c_nat, offset="center")
-        if to_wgs84:
-            lon, lat = to_wgs84.transform(x_native, y_native)
-        else:
-            lon, lat = x_native, y_native
-        if lon >= 180: lon -= 360
-        if lon < -180: lon += 360
-        out.append({"lon": float(lon), "lat": float(lat)})
-    return out
+    rc = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if rc.shape[0] == 0:
+        return np.empty(0), np.empty(0)
+    # resampled -> native pixel centres, then the window affine
+    # (same as rasterio.transform.xy(..., offset="center")) for all points
+    r_nat = (rc[:, 0] + 0.5) * sy
+    c_nat = (rc[:, 1] + 0.5) * sx
+    t = transform
+    x_native = t.a * c_nat + t.b * r_nat + t.c
+    y_native = t.d * c_nat + t.e * r_nat + t.f
+    if to_wgs84:
+        lon, lat = to_wgs84.transform(x_native, y_native)
+    else:
+        lon, lat = x_native, y_native
+    lon = np.mod(np.asarray(lon, dtype=np.float64) + 180.0, 360.0) - 180.0
+    lat = np.asarray(lat, dtype=np.float64)
+    return lon, lat
+
+
+def lonlat_records(lon, lat):
+    """[{"lon": .., "lat": ..}] as written by save_path_geojson_like."""
+    return [{"lon": x, "lat": y} for x, y in zip(np.asarray(lon).tolist(), np.asarray(lat).tolist())]
+
+
+def path_rc_to_lonlat_geotiff_resampled(path, **kwargs):
+    """path_rc_to_lonlat_arrays as a list of {"lon", "lat"} records."""
+    return lonlat_records(*path_rc_to_lonlat_arrays(path, **kwargs))
+# endregion
+
+# region Blitting
+def blit_updater(fig, ax, artist):
+    """
+    Returns update(): redraw only `artist` (created with animated=True) over
+    a cached copy of the axes, instead of re-rendering the whole image. The
+    cache is refreshed on every full draw (first show, resize, zoom).
+    """
+    state = {"bg": None}
+
+    def on_draw(event):
+        state["bg"] = fig.canvas.copy_from_bbox(ax.bbox)
+        ax.draw_artist(artist)
+
+    fig.canvas.mpl_connect("draw_event", on_draw)
+
+    def update():
+        if state["bg"] is None or not getattr(fig.canvas, "supports_blit", False):
+            fig.canvas.draw_idle()
+            return
+        fig.canvas.restore_region(state["bg"])
+        ax.draw_artist(artist)
+        fig.canvas.blit(ax.bbox)
+
+    return update
+# endregion
+
+# region Crop Cache
+@lru_cache(maxsize=4)
+def _cached_layers(tif_path, mtime, col_off, row_off, width, height, maxdim, thresh):
+    # mtime is only used as part of the key, so an edited file is reloaded
+    from rasterio.windows import Window
+    layers = make_mars_from_geotiff_window(
+        tif_path,
+        window=Window(col_off, row_off, width, height),
+        target_max_dim=maxdim,
+        steep_block_thresh_deg=thresh,
+        block_by_slope=True,
+    )
+    WeightedCost().attach_grid(layers)
+    # shared by every hit, so the planes are read-only
+    for a in (layers.height, layers.slope, layers.rough, layers.blocked, layers.cost):
+        if a is not None:
+            a.flags.writeable = False
+    return layers
+
+
+def load_crop_layers(tif_path, window, maxdim, steep_block_thresh_deg=35.0):
+    """
+    make_mars_from_geotiff_window plus WeightedCost.cost_grid, cached on
+    (path, mtime, window, maxdim, threshold). Returns a shallow copy whose
+    arrays are read-only and shared with the cache.
+    """
+    layers = _cached_layers(
+        tif_path, os.path.getmtime(tif_path),
+        int(window.col_off), int(window.row_off), int(window.width), int(window.height),
+        int(maxdim), float(steep_block_thresh_deg),
+    )
+    return copy.copy(layers)
 # endregion
 
 # region Tk Application
@@ -123,6 +253,11 @@ class RoverApp:
         self.roundtrip = tk.BooleanVar(value=False)
         self.fast_mode = tk.BooleanVar(value=True)
         self.skip_3d = tk.BooleanVar(value=not HAVE_3D)
+        self.jps_mode = tk.BooleanVar(value=False)
+        self.hpa_mode = tk.BooleanVar(value=False)
+        self.bidir_mode = tk.BooleanVar(value=False)
+        self.hpa = None      # HPAGraph for the current layers, built on demand
+        self.hpa_key = None
         self.maxdim = tk.IntVar(value=1024)
 
         frm = tk.Frame(root); frm.pack(pady=5)
@@ -134,16 +269,33 @@ class RoverApp:
         tk.Checkbutton(frm, text="Skip 3D", variable=self.skip_3d).grid(row=1, column=2)
         tk.Label(frm, text="Max Dim:").grid(row=1, column=3, padx=(10,0))
         tk.Entry(frm, textvariable=self.maxdim, width=6).grid(row=1, column=4)
+        tk.Checkbutton(frm, text="Uniform Cost (JPS)", variable=self.jps_mode).grid(row=2, column=0, columnspan=2)
+        tk.Checkbutton(frm, text="Hierarchical (HPA*)", variable=self.hpa_mode).grid(row=2, column=2, columnspan=2)
+        tk.Checkbutton(frm, text="Bidirectional", variable=self.bidir_mode).grid(row=2, column=4)
 
         self.logbox = tk.Text(root, height=11, width=88, state=tk.DISABLED,
                               bg="#111", fg="#0f0", font=("Courier", 9))
         self.logbox.pack(padx=10, pady=10)
+        self._pending = collections.deque()
+        self._flush_id = None
         # endregion
 
     # region Logging
     def log(self, msg):
+        # queued and written by one flush per 50 ms, so a burst of lines
+        # costs a single Text reconfigure/insert/scroll
+        self._pending.append(msg)
+        if self._flush_id is None:
+            self._flush_id = self.root.after(50, self._flush_logs)
+
+    def _flush_logs(self):
+        self._flush_id = None
+        if not self._pending:
+            return
+        lines = "\n".join(self._pending) + "\n"
+        self._pending.clear()
         self.logbox.config(state=tk.NORMAL)
-        self.logbox.insert(tk.END, msg + "\n")
+        self.logbox.insert(tk.END, lines)
         self.logbox.see(tk.END)
         self.logbox.config(state=tk.DISABLED)
     # endregion
@@ -170,21 +322,46 @@ class RoverApp:
         tif_path = self.tif_path.get()
         self.log(f"Opening {tif_path} for region selection...")
 
+        def read_thumb(src):
+            return src.read(
+                1,
+                out_shape=out_shape,
+                resampling=rasterio.enums.Resampling.bilinear,
+                out_dtype="float32",
+            )
+
+        # One open for the georeferencing and (without overviews) the
+        # thumbnail; the handle is closed before the blocking picker window.
         with rasterio.open(tif_path) as ds:
+            src_transform, src_crs = ds.transform, ds.crs
             scale = min(1.0, 800 / max(ds.width, ds.height))
-            thumb = ds.read(
-                1,
-                out_shape=(int(ds.height * scale), int(ds.width * scale)),
-                resampling=rasterio.enums.Resampling.bilinear
-            ).astype(np.float32)
-            thumb -= thumb.min()
-            if thumb.max() > 0: thumb /= thumb.max()
+            out_shape = (int(ds.height * scale), int(ds.width * scale))
+            # Coarsest overview that is still at least thumbnail-sized, so
+            # GDAL decodes a few hundred pixels instead of the full raster.
+            factors = ds.overviews(1)
+            ov_level = None
+            for i, f in enumerate(factors):
+                if max(ds.width, ds.height) / f >= 800:
+                    ov_level = i
+            if ov_level is None:
+                thumb = read_thumb(ds)
+        if ov_level is not None:
+            with rasterio.open(tif_path, overview_level=ov_level) as ov:
+                thumb = read_thumb(ov)
+        elif scale < 1.0 and not factors:
+            self.log("No overviews in this file; run `gdaladdo` on it for faster previews.")
+        thumb -= thumb.min()
+        if thumb.max() > 0: thumb /= thumb.max()
 
         # region Rectangle Selection
         sel = {"extent": None}
         fig, ax = plt.subplots(figsize=(8, 6))
         ax.imshow(thumb, cmap="gray", origin="upper")
         ax.set_title("Drag a box to select region. Close window when done.")
+        box = plt.Rectangle((0, 0), 0, 0, edgecolor="red", facecolor="none",
+                            lw=2, visible=False, animated=True)
+        ax.add_patch(box)
+        redraw_box = blit_updater(fig, ax, box)
         def onselect(eclick, erelease):
             x0, y0 = eclick.xdata, eclick.ydata
             x1, y1 = erelease.xdata, erelease.ydata
@@ -195,11 +372,9 @@ class RoverApp:
             width = int(round(abs(x1 - x0) / scale))
             height = int(round(abs(y1 - y0) / scale))
             sel["extent"] = (col_off, row_off, width, height)
-            ax.add_patch(plt.Rectangle(
-                (min(x0, x1), min(y0, y1)),
-                abs(x1 - x0), abs(y1 - y0),
-                edgecolor="red", facecolor="none", lw=2))
-            fig.canvas.draw()
+            box.set_bounds(min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0))
+            box.set_visible(True)
+            redraw_box()
         _rs = RectangleSelector(ax, onselect, useblit=True,
                                 button=[MouseButton.LEFT],
                                 minspanx=5, minspany=5,
@@ -228,31 +403,25 @@ class RoverApp:
             maxdim_val = min(maxdim_val, 768)
         maxdim_val = max(maxdim_val, 16)
         self.log("Loading GeoTIFF crop...")
-        layers = make_mars_from_geotiff_window(
-            tif_path,
-            window=win,
-            target_max_dim=maxdim_val,
-            steep_block_thresh_deg=35.0,
-            block_by_slope=True,
-        )
+        layers = load_crop_layers(tif_path, win, maxdim_val, steep_block_thresh_deg=35.0)
         self.layers = layers
+        self.hpa = None
 
         blk_frac = float(layers.blocked.mean())
         H, W = layers.slope.shape
         self.log(f"Loaded crop (resampled): {H}×{W} | meters/px ≈ {layers.meters_per_cell:.2f}")
         self.log(f"Blocked fraction: {blk_frac:.1%}")
 
-        with rasterio.open(tif_path) as ds:
-            tf = rasterio.windows.transform(win, ds.transform)
-            self.window_transform = tf
-            self.crs = ds.crs
-            xmin, ymax = tf * (0, 0)
-            xmax, ymin = tf * (int(win.width), int(win.height))
-            self.extent = [xmin, xmax, ymax, ymin]
-            if ds.crs and getattr(ds.crs, "is_geographic", False):
-                self.log(f"Geo extent: lon {xmin:.3f}→{xmax:.3f}, lat {ymin:.3f}→{ymax:.3f}")
-            else:
-                self.log("Note: CRS not geographic; will transform to WGS84 if pyproj available.")
+        tf = rasterio.windows.transform(win, src_transform)
+        self.window_transform = tf
+        self.crs = src_crs
+        xmin, ymax = tf * (0, 0)
+        xmax, ymin = tf * (int(win.width), int(win.height))
+        self.extent = [xmin, xmax, ymax, ymin]
+        if src_crs and getattr(src_crs, "is_geographic", False):
+            self.log(f"Geo extent: lon {xmin:.3f}→{xmax:.3f}, lat {ymin:.3f}→{ymax:.3f}")
+        else:
+            self.log("Note: CRS not geographic; will transform to WGS84 if pyproj available.")
         # endregion
 
     # region Planning
@@ -267,11 +436,14 @@ class RoverApp:
         fig, ax = plt.subplots(figsize=(8, 6))
         ax.imshow(img, cmap="gray", origin="upper")
         pts = []
+        marks, = ax.plot([], [], "ro", animated=True)
+        redraw_marks = blit_updater(fig, ax, marks)
         def onclick(event):
             if event.button == 1 and event.xdata is not None and event.ydata is not None:
                 r, c = int(event.ydata), int(event.xdata)
                 pts.append((r, c))
-                ax.plot(c, r, "ro"); fig.canvas.draw()
+                marks.set_data([p[1] for p in pts], [p[0] for p in pts])
+                redraw_marks()
         fig.canvas.mpl_connect("button_press_event", onclick)
         plt.show(block=True)
         # endregion
@@ -291,10 +463,35 @@ class RoverApp:
         pad = 150 if self.fast_mode.get() else int(0.35 * max(H, W))
         bounds = roi_bounds([start] + goals, H, W, pad=pad)
         rmin, rmax, cmin, cmax = bounds
-        nfn = neighbors_fn_roi(H, W, bounds, four_connected=four_conn)
-        hfn = weighted_heuristic_fn(eps=eps)
         self.log(f"ROI: rows {rmin}-{rmax}, cols {cmin}-{cmax} | eps={eps}")
-        cost_fn = WeightedCost().edge_cost_fn(self.layers)
+        wc = WeightedCost()
+        cost = wc.attach_grid(self.layers)
+        roi_cost = cost[rmin:rmax + 1, cmin:cmax + 1]
+        roi_open = roi_cost[np.isfinite(roi_cost)]
+        # A flat cost makes every edge cost proportional to its length, which
+        # Jump Point Search solves exactly; the checkbox forces JPS and plans
+        # on distance alone.
+        uniform = not four_conn and roi_open.size > 0 and roi_open.min() == roi_open.max()
+        use_jps = uniform or bool(self.jps_mode.get())
+        jps_pen = float(roi_open[0]) if uniform else 1.0
+        if use_jps:
+            self.log("Planner: jump point search (uniform cost)")
+        elif HAVE_NUMBA:
+            # compiled search reads the per-cell cost grid directly
+            steps = STEPS4 if four_conn else STEPS8
+            if self.hpa_mode.get() and (self.hpa is None or self.hpa_key != four_conn):
+                # the abstract graph covers the whole crop and is reused by
+                # every later plan() on the same layers
+                t0 = time.perf_counter()
+                self.hpa = HPAGraph(cost, steps, self.layers.meters_per_cell,
+                                    diag_cost=wc.diag_cost)
+                self.hpa_key = four_conn
+                self.log(f"HPA* graph: {len(self.hpa.edges)} nodes in {time.perf_counter() - t0:.2f}s")
+        else:
+            nfn = neighbors_fn_roi(H, W, bounds, four_connected=four_conn, flat=True)
+            hfn = weighted_heuristic_fn(eps=eps, four_connected=four_conn)
+            h_table_fn = manhattan_table if four_conn else octile_table
+            cost_fn = wc.edge_cost_fn(self.layers, flat=True)
         # endregion
 
         # region Plan Legs
@@ -303,7 +500,37 @@ class RoverApp:
         total_cost = 0.0
         for i in range(len(order) - 1):
             a, b = order[i], order[i + 1]
-            path, leg_cost, *_ = astar(a, b, nfn, cost_fn, hfn)
+            if use_jps:
+                path, leg_cost, *_ = jps(
+                    a, b, self.layers.blocked, bounds,
+                    meters_per_cell=self.layers.meters_per_cell,
+                    diag_cost=wc.diag_cost, weight=eps,
+                )
+                leg_cost *= jps_pen
+            elif HAVE_NUMBA:
+                path = None
+                if self.hpa_mode.get():
+                    path, leg_cost, *_ = self.hpa.find_path(a, b, weight=eps)
+                    if path is None:
+                        self.log(f"HPA* found no path for leg {a}->{b}; falling back to full search")
+                long_leg = max(abs(a[0] - b[0]), abs(a[1] - b[1])) >= BIDIR_MIN_CELLS
+                if path is None and self.bidir_mode.get() and eps == 1.0 and long_leg:
+                    # exact NBA*; weighted (fast mode) legs stay unidirectional
+                    path, leg_cost, *_ = astar_bidir_numba(
+                        a, b, cost, bounds, steps,
+                        meters_per_cell=self.layers.meters_per_cell,
+                        diag_cost=wc.diag_cost,
+                    )
+                elif path is None:
+                    path, leg_cost, *_ = astar_numba(
+                        a, b, cost, bounds, steps,
+                        meters_per_cell=self.layers.meters_per_cell,
+                        diag_cost=wc.diag_cost, weight=eps,
+                    )
+            else:
+                path, leg_cost, *_ = astar(a, b, nfn, cost_fn, hfn, shape=(H, W),
+                                           h_table=eps * h_table_fn(b, (H, W)),
+                                           flat_ids=True, bounds=bounds)
             if not path:
                 messagebox.showerror("Planning failed", f"No feasible path for leg {a}->{b}")
                 return
@@ -332,7 +559,7 @@ class RoverApp:
         if (self.window_transform is not None) and (self.win_size_native is not None):
             try:
                 H_nat, W_nat = self.win_size_native
-                ll = path_rc_to_lonlat_geotiff_resampled(
+                lons, lats = path_rc_to_lonlat_arrays(
                     full_path,
                     transform=self.window_transform,
                     crs=self.crs,
@@ -340,15 +567,12 @@ class RoverApp:
                     win_w_native=W_nat,
                     H_resampled=H,
                     W_resampled=W)
-                lons = [p["lon"] for p in ll]; lats = [p["lat"] for p in ll]
-                lon_span, lat_span = max(lons) - min(lons), max(lats) - min(lats)
-                if abs(lon_span) < 1.0 or abs(lat_span) < 1.0 or max(map(abs, lons)) > 360:
-                    lon_min, lon_max = min(lons), max(lons)
-                    lat_min, lat_max = min(lats), max(lats)
-                    for p in ll:
-                        p["lon"] = ((p["lon"] - lon_min) / (lon_max - lon_min)) * 10 - 5
-                        p["lat"] = ((p["lat"] - lat_min) / (lat_max - lat_min)) * 10 - 5
-                save_path_geojson_like(ll, "globe/route_lonlat.json")
+                lon_span, lat_span = np.ptp(lons), np.ptp(lats)
+                if lon_span < 1.0 or lat_span < 1.0 or np.abs(lons).max() > 360:
+                    # looks local: stretch onto a 10-degree patch for the globe
+                    lons = (lons - lons.min()) / (lon_span or 1.0) * 10 - 5
+                    lats = (lats - lats.min()) / (lat_span or 1.0) * 10 - 5
+                save_path_geojson_like(lonlat_records(lons, lats), "globe/route_lonlat.json")
                 self.log("Exported route_lonlat.json for globe viewer.")
             except Exception as e:
                 self.log(f"Geo export failed: {e}")
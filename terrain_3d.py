@@ -3,10 +3,15 @@ import numpy as np
 import pyvista as pv
 # endregion
 
+# Paths longer than this are drawn as one line strip instead of a splined tube
+LINE_PATH_MIN = 1000
+
 # region DEM 3D Plot
-def plot_dem_3d(layers, path=None, meters_per_cell=None, title="Mars DEM 3D"):
+def plot_dem_3d(layers, path=None, meters_per_cell=None, title="Mars DEM 3D", max_dim=1024):
     """
     Render Mars terrain (DEM) with optional A* path overlay.
+    The surface is strided down to at most max_dim vertices per side; the
+    path and blocked markers stay at full resolution.
     Requires pyvista installed.
     """
     elev = layers.elevation_m
@@ -16,19 +21,21 @@ def plot_dem_3d(layers, path=None, meters_per_cell=None, title="Mars DEM 3D"):
     mpc = meters_per_cell or getattr(layers, "meters_per_cell", 1.0)
 
     # region Build Grid
-    xs = np.arange(W, dtype=np.float32) * mpc
-    ys = np.arange(H, dtype=np.float32) * mpc
+    step = max(1, -(-max(H, W) // int(max_dim)))
+    elev_ds = elev[::step, ::step]
+    xs = np.arange(elev_ds.shape[1], dtype=np.float32) * (step * mpc)
+    ys = np.arange(elev_ds.shape[0], dtype=np.float32) * (step * mpc)
     xx, yy = np.meshgrid(xs, ys)
-    surf = pv.StructuredGrid(xx, yy, elev.astype(np.float32))
+    surf = pv.StructuredGrid(xx, yy, elev_ds.astype(np.float32, copy=False))
     # endregion
 
     # region Surface Coloring
     if getattr(layers, "slope", None) is not None:
-        surf["slope_deg"] = layers.slope.ravel(order="C")
+        surf["slope_deg"] = np.ascontiguousarray(layers.slope[::step, ::step]).ravel(order="C")
         scalars = "slope_deg"
         cmap = "viridis"
     else:
-        surf["elev_m"] = elev.ravel(order="C")
+        surf["elev_m"] = np.ascontiguousarray(elev_ds).ravel(order="C")
         scalars = "elev_m"
         cmap = "terrain"
     # endregion
@@ -41,13 +48,23 @@ def plot_dem_3d(layers, path=None, meters_per_cell=None, title="Mars DEM 3D"):
 
     # region Blocked Cells Overlay
     if getattr(layers, "blocked", None) is not None:
-        blk_idx = np.argwhere(layers.blocked)
-        if len(blk_idx) > 0:
-            yy_blk = blk_idx[:, 0] * mpc
-            xx_blk = blk_idx[:, 1] * mpc
-            zz = elev[blk_idx[:, 0], blk_idx[:, 1]]
-            for xb, yb, zb in zip(xx_blk[::200], yy_blk[::200], zz[::200]):  # decimate for speed
-                p.add_lines(np.array([[xb, yb, zb], [xb, yb, zb + 50.0]]), color="white", width=2)
+        # one flat id array, decimated before any per-marker work (argwhere
+        # would build an (N, 2) array for every blocked cell)
+        blk_ids = np.flatnonzero(layers.blocked)[::200]
+        if len(blk_ids) > 0:
+            br, bc = np.divmod(blk_ids, W)
+            # one PolyData holding every marker segment -> a single VTK actor
+            n = len(blk_ids)
+            pts = np.empty((2 * n, 3), dtype=np.float32)
+            pts[0::2, 0] = bc * mpc
+            pts[0::2, 1] = br * mpc
+            pts[0::2, 2] = elev[br, bc]
+            pts[1::2] = pts[0::2]
+            pts[1::2, 2] += 50.0
+            lines = np.column_stack([
+                np.full(n, 2), np.arange(0, 2 * n, 2), np.arange(1, 2 * n, 2)
+            ]).ravel()
+            p.add_mesh(pv.PolyData(pts, lines=lines), color="white", line_width=2)
     # endregion
 
     # region Path Overlay
@@ -59,7 +76,12 @@ def plot_dem_3d(layers, path=None, meters_per_cell=None, title="Mars DEM 3D"):
         py = pr * mpc
         pz = elev[pr, pc]
         pts = np.c_[px, py, pz]
-        p.add_mesh(pv.Spline(pts, 200).tube(radius=mpc * 0.5), color="cyan")
+        if len(pts) > LINE_PATH_MIN:
+            # skip the spline fit and tube triangulation for long traverses
+            strip = np.concatenate([[len(pts)], np.arange(len(pts))])
+            p.add_mesh(pv.PolyData(pts, lines=strip), color="cyan", line_width=3)
+        elif len(pts) > 1:
+            p.add_mesh(pv.Spline(pts, min(200, len(pts))).tube(radius=mpc * 0.5), color="cyan")
     # endregion
 
     # region Final Display
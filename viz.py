@@ -1,8 +1,138 @@
 # region Imports
+from functools import lru_cache
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Patch
-from matplotlib.lines import Line2D
+# matplotlib is imported inside the drawing functions, so importing this
+# module stays cheap for callers that never render
+# endregion
+
+# Coarser than matplotlib's default (1/9 px) line simplification; long A*
+# routes lose nothing visible at this tolerance
+_RC = {"path.simplify": True, "path.simplify_threshold": 1.0}
+
+# Fixed subplot margins (axes are off; room for the title and colorbar
+# labels) in place of a tight_layout pass over every artist's extent
+_MARGINS = {"left": 0.02, "right": 0.9, "bottom": 0.02, "top": 0.95}
+
+# region Layer Helpers
+def _base_image(layers):
+    """Terrain backdrop and its colormap (elevation, else a slope/rough blend)."""
+    base = getattr(layers, "elevation_m", None)
+    if base is not None:
+        # one explicit float32, C-ordered copy at most (none if already so)
+        # instead of whatever imshow would make of a strided view
+        return np.ascontiguousarray(base, dtype=np.float32), "terrain"
+
+    # The blend is cached on layers together with the arrays it was made
+    # from, so rebinding slope/rough/blocked invalidates it; after editing
+    # them in place, set layers._viz_base = None.
+    src = (layers.slope, layers.rough, layers.blocked)
+    cached = getattr(layers, "_viz_base", None)
+    if cached is not None and all(a is b for a, b in zip(cached[0], src)):
+        return cached[1], "gray"
+    # the blend is already a fresh array, safe to mark blocked cells in
+    base = layers.slope * 0.7 + layers.rough * 0.3
+    base[layers.blocked] = base.max() + 0.3
+    base = np.ascontiguousarray(base, dtype=np.float32)
+    base.flags.writeable = False
+    layers._viz_base = (src, base)
+    return base, "gray"
+
+
+def _order_map(H, W, expanded_order, step=1, out=None, first=1):
+    """
+    Raster of 1-based expansion ranks (0 = not expanded) and the highest rank.
+    With step > 1 each pixel covers a step x step block of cells and keeps
+    the block's latest rank, shape (ceil(H / step), ceil(W / step)).
+    With out, the ranks first, first + 1, ... are scattered into that map
+    instead, continuing an earlier call.
+    """
+    # one scatter of the expansion ranks instead of a per-cell loop; the
+    # compiled searches' (N, 2) int32 expanded_order is used without a copy
+    rc = np.asarray(expanded_order, dtype=np.int32).reshape(-1, 2)
+    n = first - 1 + len(rc)
+    if out is None:
+        # raw ranks in the narrowest integer type; imshow's Normalize does
+        # the scaling (0 = not expanded, drawn like the earliest rank)
+        dt = np.uint8 if n < 256 else np.uint16 if n < 65536 else np.uint32
+        out = np.zeros((-(-H // step), -(-W // step)), dtype=dt)
+    # searches only expand in-grid cells, so no per-cell mask; the check
+    # runs in debug mode only (python -O strips it)
+    assert not len(rc) or (rc.min() >= 0 and rc[:, 0].max() < H and rc[:, 1].max() < W), \
+        "expanded cell outside the grid"
+    out[rc[:, 0] // step, rc[:, 1] // step] = np.arange(first, n + 1, dtype=out.dtype)
+    return out, n
+
+
+def _display_grid(fig, H, W, extent):
+    """
+    ModestImage-style subsampling for an (H, W) raster in fig: the stride
+    that keeps about 2x the figure's pixel resolution, and the imshow
+    extent of the strided image (which may overhang the last row/column;
+    crop with the returned limits). step == 1 leaves everything as is.
+    """
+    target = int(max(fig.get_size_inches()) * fig.dpi * 2)
+    step = max(1, max(H, W) // max(1, target))
+    left, right, bottom, top = extent if extent is not None else (-0.5, W - 0.5, H - 0.5, -0.5)
+    if step == 1:
+        return 1, extent, None
+    Hs, Ws = -(-H // step) * step, -(-W // step) * step
+    img_extent = (left, left + (right - left) * Ws / W, top + (bottom - top) * Hs / H, top)
+    return step, img_extent, ((left, right), (bottom, top))
+
+
+def _path_xy(path, H, W, extent):
+    """Plot coordinates (xs, ys) of (r, c) cells, in map units when extent is set."""
+    # one array conversion serves both branches (no zip(*path) transpose)
+    P = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if extent is None:
+        return P[:, 1], P[:, 0]
+    xmin, xmax, ymax, ymin = extent
+    # one broadcast linear map over all cells
+    xs_m = xmin + (xmax - xmin) * (P[:, 1] / (W - 1))
+    ys_m = ymin + (ymax - ymin) * (P[:, 0] / (H - 1))
+    return xs_m, ys_m
+
+
+def _turn_cells(path):
+    """
+    The cells of path where its step direction changes, plus both ends.
+    The straight runs in between draw identically from their end points,
+    so grid routes shrink to a small fraction of their vertices.
+    """
+    P = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+    if len(P) < 3:
+        return P
+    d = np.diff(P, axis=0)
+    keep = np.r_[True, (d[1:] != d[:-1]).any(axis=1), True]
+    return P[keep]
+
+
+@lru_cache(maxsize=None)
+def _cmap(name):
+    # matplotlib.colormaps[name] returns a fresh copy, whose lookup table is
+    # rebuilt on first use; resolve each name once. Normalize objects are not
+    # shared the same way, since they keep the limits they autoscale to.
+    import matplotlib
+    return matplotlib.colormaps[name]
+
+
+@lru_cache(maxsize=None)
+def _legend_elements():
+    # built once on first use rather than at import (matplotlib is lazy
+    # here); the proxies are only read by Legend, so every axes shares them
+    from matplotlib.patches import Patch
+    from matplotlib.lines import Line2D
+    return (
+        Line2D([0], [0], color="cyan", lw=2, label="A* path"),
+        Line2D([0], [0], marker="o", color="w", label="Start",
+               markerfacecolor="white", markeredgecolor="black", markersize=9),
+        Line2D([0], [0], marker="o", color="w", label="Goal",
+               markerfacecolor="yellow", markeredgecolor="black", markersize=9),
+        Patch(facecolor="white", edgecolor="black", label="Blocked / Impassable"),
+        Patch(facecolor="gray", label="Traversable (synthetic base)"),
+        Patch(facecolor="purple", label="Early expansion (A*)"),
+        Patch(facecolor="yellow", label="Late expansion (A*)"),
+    )
 # endregion
 
 # region Visualization Function
@@ -16,80 +146,169 @@ def show_search_heatmap(
     layers,
     title="A* exploration",
     extent=None,
+    save_path=None,
 ):
     """
     Render terrain with optional A* expansion overlay and path.
     If extent is provided, axes correspond to map coordinates.
+    With save_path the figure is written there (PNG etc.) instead of shown.
     """
+    import matplotlib
+    from matplotlib.cm import ScalarMappable
+    from matplotlib.colors import Normalize
+    from matplotlib.figure import Figure
+
     # region Base Image
-    base = getattr(layers, "elevation_m", None)
-    cmap = "terrain" if base is not None else "gray"
-    if base is None:
-        base = layers.slope * 0.7 + layers.rough * 0.3
-        base = base.copy()
-        base[layers.blocked] = base.max() + 0.3
+    base, cmap = _base_image(layers)
     # endregion
 
-    fig, ax = plt.subplots(figsize=(8, 8))
-    ax.imshow(base, origin="upper", cmap=cmap, alpha=0.9, extent=extent)
-
-    # region Expansion Heat Overlay
-    if expanded_order:
-        order_map = np.zeros((H, W), dtype=np.float32)
-        for i, cell in enumerate(expanded_order):
-            r, c = cell
-            if 0 <= r < H and 0 <= c < W:
-                order_map[r, c] = i + 1
-        order_map /= max(1.0, order_map.max())
-        heat = ax.imshow(order_map, origin="upper", cmap="viridis", alpha=0.6, extent=extent)
-        cbar = fig.colorbar(heat, ax=ax, fraction=0.046, pad=0.04)
-        cbar.set_label("A* expansion (early → late)")
-    # endregion
+    with matplotlib.rc_context(_RC):
+        if save_path is None:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=(8, 8))
+        else:
+            # a bare Figure renders with Agg on savefig, without pyplot, the
+            # GUI backend or its event loop
+            fig = Figure(figsize=(8, 8))
+            ax = fig.subplots()
+        fig.subplots_adjust(**_MARGINS)
+        step, img_extent, limits = _display_grid(fig, H, W, extent)
+        base = base[::step, ::step]
 
-    # region Path Overlay
-    if path:
-        ys, xs = zip(*path)
-        if extent is None:
+        # region Expansion Heat Overlay
+        if len(expanded_order):
+            # Composite terrain (alpha 0.9 over the white axes) and the viridis
+            # ranks (alpha 0.6) once in NumPy, so only one opaque image is drawn.
+            order_map, n = _order_map(H, W, expanded_order, step)
+            heat_norm = Normalize(vmin=1, vmax=max(1, n))
+            base_rgb = _cmap(cmap)(Normalize()(base), bytes=True)[..., :3]
+            heat_rgb = _cmap("viridis")(heat_norm(order_map), bytes=True)[..., :3]
+            rgb = (0.6 / 255) * heat_rgb.astype(np.float32)
+            rgb += (0.4 * 0.9 / 255) * base_rgb
+            rgb += 0.4 * 0.1
+            ax.imshow(rgb, origin="upper", extent=img_extent,
+                      interpolation="nearest", resample=False)
+            cbar = fig.colorbar(ScalarMappable(norm=heat_norm, cmap=_cmap("viridis")), ax=ax,
+                                fraction=0.046, pad=0.04, alpha=0.6)
+            cbar.set_label("A* expansion (early → late)")
+        else:
+            ax.imshow(base, origin="upper", cmap=_cmap(cmap), alpha=0.9, extent=img_extent,
+                      interpolation="nearest", resample=False)
+        # endregion
+
+        # region Path Overlay
+        if path:
+            xs, ys = _path_xy(_turn_cells(path), H, W, extent)
+            # one simplified Line2D; a LineCollection of per-step segments
+            # draws ~8x slower (each segment is its own stroke, and it
+            # loses the line joins at turns)
             ax.plot(xs, ys, color="cyan", linewidth=2.5, label="A* path")
-            sx, sy = start[1], start[0]
-            gx, gy = goal[1], goal[0]
+            # start and goal as one PathCollection; the legend entries come
+            # from _legend_elements, not from artist labels
+            ax.scatter(*_path_xy([start, goal], H, W, extent), s=100, edgecolors="black",
+                       facecolors=["white", "yellow"], zorder=3)
+        # endregion
+
+        if limits is not None:
+            ax.set_xlim(*limits[0])
+            ax.set_ylim(*limits[1])
+
+        # region Legend / Layout
+        ax.legend(handles=_legend_elements(), loc="lower right", fontsize=8, framealpha=0.85)
+        ax.set_title(title)
+        ax.set_axis_off()
+        if save_path is None:
+            plt.show()
         else:
-            xmin, xmax, ymax, ymin = extent
-
-            def rc_to_xy(r, c):
-                x = xmin + (xmax - xmin) * (c / (W - 1))
-                y = ymin + (ymax - ymin) * (r / (H - 1))
-                return x, y
-
-            xs_m, ys_m = [], []
-            for r, c in path:
-                x, y = rc_to_xy(r, c)
-                xs_m.append(x)
-                ys_m.append(y)
-            ax.plot(xs_m, ys_m, color="cyan", linewidth=2.5, label="A* path")
-            sx, sy = rc_to_xy(*start)
-            gx, gy = rc_to_xy(*goal)
-
-        ax.scatter(sx, sy, s=100, edgecolors="black", facecolors="white", label="Start", zorder=3)
-        ax.scatter(gx, gy, s=100, edgecolors="black", facecolors="yellow", label="Goal", zorder=3)
-    # endregion
+            fig.savefig(save_path, dpi=100)
+        # endregion
+# endregion
 
-    # region Legend / Layout
-    legend_elements = [
-        Line2D([0], [0], color="cyan", lw=2, label="A* path"),
-        Line2D([0], [0], marker="o", color="w", label="Start",
-               markerfacecolor="white", markeredgecolor="black", markersize=9),
-        Line2D([0], [0], marker="o", color="w", label="Goal",
-               markerfacecolor="yellow", markeredgecolor="black", markersize=9),
-        Patch(facecolor="white", edgecolor="black", label="Blocked / Impassable"),
-        Patch(facecolor="gray", label="Traversable (synthetic base)"),
-        Patch(facecolor="purple", label="Early expansion (A*)"),
-        Patch(facecolor="yellow", label="Late expansion (A*)"),
-    ]
-    ax.legend(handles=legend_elements, loc="lower right", fontsize=8, framealpha=0.85)
-    ax.set_title(title)
-    ax.set_axis_off()
-    plt.tight_layout()
-    plt.show()
-    # endregion
-# endregion
\ No newline at end of file
+# region Incremental View
+class SearchHeatmapView:
+    """
+    show_search_heatmap for repeated updates (animating a search, sliders):
+    the terrain is rendered once and cached as the axes background, and
+    update() only redraws the heat map, path and endpoint markers (animated
+    artists) over it. The cache is refreshed on every full draw (first show,
+    resize, zoom). The rank raster is one persistent uint32 buffer, so a
+    running search can stream its expansions in with add_expansions().
+    """
+
+    def __init__(self, H, W, layers, title="A* exploration", extent=None):
+        import matplotlib.pyplot as plt
+
+        self.H, self.W, self.extent = H, W, extent
+        base, cmap = _base_image(layers)
+        self.fig, self.ax = plt.subplots(figsize=(8, 8))
+        self.fig.subplots_adjust(**_MARGINS)
+        ax = self.ax
+        self.step, img_extent, limits = _display_grid(self.fig, H, W, extent)
+        base = base[::self.step, ::self.step]
+        ax.imshow(base, origin="upper", cmap=_cmap(cmap), alpha=0.9, extent=img_extent,
+                  interpolation="nearest", resample=False)
+        self.ranks = np.zeros(base.shape, dtype=np.uint32)
+        self.n_expanded = 0
+        self.heat = ax.imshow(self.ranks, origin="upper", cmap=_cmap("viridis"),
+                              alpha=0.6, extent=img_extent, vmin=1, vmax=1,
+                              interpolation="nearest", resample=False, animated=True, visible=False)
+        if limits is not None:
+            ax.set_xlim(*limits[0])
+            ax.set_ylim(*limits[1])
+        cbar = self.fig.colorbar(self.heat, ax=ax, fraction=0.046, pad=0.04)
+        cbar.set_label("A* expansion (early → late)")
+        self.path_line, = ax.plot([], [], color="cyan", linewidth=2.5, animated=True)
+        self.start_mark, = ax.plot([], [], "o", ms=10, mfc="white", mec="black", animated=True, zorder=3)
+        self.goal_mark, = ax.plot([], [], "o", ms=10, mfc="yellow", mec="black", animated=True, zorder=3)
+        ax.legend(handles=_legend_elements(), loc="lower right", fontsize=8, framealpha=0.85)
+        ax.set_title(title)
+        ax.set_axis_off()
+        self.bg_cache = None
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _artists(self):
+        return (self.heat, self.path_line, self.start_mark, self.goal_mark)
+
+    def _on_draw(self, event):
+        self.bg_cache = self.fig.canvas.copy_from_bbox(self.ax.bbox)
+        for a in self._artists():
+            self.ax.draw_artist(a)
+
+    def update(self, expanded_order=None, path=None, start=None, goal=None):
+        """Replace whichever overlays are given and blit them over the cached terrain."""
+        H, W, extent = self.H, self.W, self.extent
+        if expanded_order is not None:
+            self.ranks.fill(0)
+            _, self.n_expanded = _order_map(H, W, expanded_order, self.step, out=self.ranks)
+            self._heat_changed()
+        if path is not None:
+            self.path_line.set_data(*_path_xy(_turn_cells(path), H, W, extent) if path else ([], []))
+        if start is not None:
+            self.start_mark.set_data(*_path_xy([start], H, W, extent))
+        if goal is not None:
+            self.goal_mark.set_data(*_path_xy([goal], H, W, extent))
+        self._blit()
+
+    def add_expansions(self, cells):
+        """Rank newly expanded cells after all earlier ones and blit (progress callbacks)."""
+        _, self.n_expanded = _order_map(self.H, self.W, cells, self.step,
+                                        out=self.ranks, first=self.n_expanded + 1)
+        self._heat_changed()
+        self._blit()
+
+    def _heat_changed(self):
+        # the buffer was written in place; set_data marks the image stale
+        self.heat.set_data(self.ranks)
+        self.heat.set_clim(1, max(1, self.n_expanded))
+        self.heat.set_visible(self.n_expanded > 0)
+
+    def _blit(self):
+        canvas = self.fig.canvas
+        if self.bg_cache is None or not getattr(canvas, "supports_blit", False):
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self.bg_cache)
+        for a in self._artists():
+            self.ax.draw_artist(a)
+        canvas.blit(self.ax.bbox)
+# endregion
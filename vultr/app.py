@@ -167,7 +167,8 @@ def read_dem_window(spec: GridSpec) -> np.ndarray:
         win = from_bounds(minx, miny, maxx, maxy, ds.transform)
         arr = ds.read(
             1, window=win, out_shape=(spec.H, spec.W),
-            resampling=Resampling.bilinear, boundless=True, fill_value=np.nan
+            resampling=Resampling.bilinear, boundless=True, fill_value=np.nan,
+            out_dtype="float64",
         )
 
         band_scale = None
@@ -186,7 +187,7 @@ def read_dem_window(spec: GridSpec) -> np.ndarray:
         fill = float(np.mean(valid)) if valid.size else 0.0
         arr = np.where(np.isfinite(arr), arr, fill)
 
-    v = arr.astype(np.float64)
+    v = arr.astype(np.float64, copy=False)
 
     # Case 1: dataset defines scale/offset → use them
     if band_scale not in (None, 1.0) or band_off not in (None, 0.0):
@@ -458,7 +459,7 @@ def cog_part():
             minx_ds, miny_ds, maxx_ds, maxy_ds = minx, miny, maxx, maxy
 
         win = from_bounds(minx_ds, miny_ds, maxx_ds, maxy_ds, ds.transform)
-        arr = ds.read(1, window=win, out_shape=(H, W), resampling=resampling, boundless=True, fill_value=np.nan).astype("float64")
+        arr = ds.read(1, window=win, out_shape=(H, W), resampling=resampling, boundless=True, fill_value=np.nan, out_dtype="float64")
 
     valid = arr[np.isfinite(arr)]
     if valid.size == 0: